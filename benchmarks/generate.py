@@ -0,0 +1,286 @@
+"""
+Synthetic inputs for benchmarking the pipeline at any scale.
+
+Writes a data/ directory shaped like the real one: Members XML exports for
+both houses, the government positions CSVs, the exclusion and GOTV lists
+and the Lords phonebanking and division sheets. Scale 1 matches the size
+of the real data (~650 MPs, ~830 Lords, ~3.5k appointments); scale 10 is
+ten times that, and so on. Output is deterministic for a given seed.
+
+    python benchmarks/generate.py 10 /tmp/bench-10x
+"""
+
+import argparse
+import csv
+import datetime
+import os
+import random
+import uuid
+from xml.sax.saxutils import escape
+
+MPS_PER_SCALE = 650
+LORDS_PER_SCALE = 830
+APPOINTMENTS_PER_SCALE = 3500
+POSTS_PER_SCALE = 890
+EXCLUDE_MPS_PER_SCALE = 106
+EXCLUDE_LORDS_PER_SCALE = 71
+GOTV_LORDS_PER_SCALE = 13
+DIVISION_VOTES_PER_SCALE = 160
+PHONEBANKING_PER_SCALE = 450
+
+FIRST_NAMES = [
+    'Diane', 'Tahir', 'Apsana', 'Olivia', 'Richard', 'Dawn', 'Ian', 'Marsha', 'Mary', 'Kim',
+    'Nadia', 'Lisa', 'Pete', 'Ellie', 'Julian', 'Imran', 'Sarah', 'Stephen', 'Angela', 'Peter',
+    'Helena', 'Shami', 'Michael', 'Jane', 'Janet', 'David', 'Margaret', 'John', 'Keir', 'Rachel',
+]
+LAST_NAMES = [
+    'Abbott', 'Ali', 'Begum', 'Blake', 'Burgon', 'Butler', 'Byrne', 'Cordova', 'Foy', 'Johnson',
+    'Whittome', 'Smart', 'Wishart', 'Chowns', 'Lewis', 'Hussain', 'Jones', 'Timms', 'Rayner', 'Kyle',
+    'Kennedy', 'Chakrabarti', 'Cashman', 'Campbell', 'Whitaker', 'Anderson', 'Hodge', 'Smith', 'Reeves', 'Evans',
+    'Ponsonby', 'Hain', 'Meacher', 'Prashar', 'Falkner', 'Curran', 'Alton', 'Blunkett', 'Boateng', 'Desai',
+]
+PLACES = [
+    'Swansea', 'Ipswich', 'Hill Top', 'Hampstead', 'Highbury', 'Cumnock', 'Kentish Town', 'Southwark',
+    'Anfield', 'Norwood Green', 'Blackheath', 'Bennachie', 'Dalston', 'Buckley', 'Cleveden', 'Liverpool',
+]
+TITLES = ['', '', '', 'Ms ', 'Mr ', 'Dr ', 'Sir ', 'Dame ']
+
+COMMONS_PARTIES = [
+    ('Labour', 50), ('Labour (Co-op)', 8), ('Conservative', 18), ('Liberal Democrat', 11),
+    ('Scottish National Party', 2), ('Independent', 2), ('Reform UK', 1), ('Green Party', 1),
+    ('Democratic Unionist Party', 1), ('Sinn Féin', 1), ('Plaid Cymru', 1),
+    ('Social Democratic & Labour Party', 1), ('Traditional Unionist Voice', 1),
+]
+LORDS_PARTIES = [
+    ('Conservative', 33), ('Labour', 23), ('Crossbench', 22), ('Liberal Democrat', 9),
+    ('Non-affiliated', 6), ('Bishops', 3), ('Green Party', 1), ('Democratic Unionist Party', 1),
+    ('Ulster Unionist Party', 1), ('Lord Speaker', 1),
+]
+POST_PREFIXES = [
+    ('Secretary of State for', 'SoS', 2), ('Minister for', 'MoS', 4),
+    ('Parliamentary Under-Secretary of State for', 'PUSS', 5),
+]
+POST_SUBJECTS = [
+    'Transport', 'Health', 'Energy', 'Housing', 'Culture', 'Defence', 'Trade', 'Science',
+    'Farming', 'Policing', 'Prisons', 'Skills', 'Europe', 'Africa', 'Sport', 'Digital',
+]
+CABINET_STATUSES = [('Non-cabinet', 78), ('Full cabinet', 17), ('Attends cabinet', 5)]
+VOTES = ['Content', 'Not Content']
+OUTCOMES = ['', '', '', 'Voice message', 'No answer only email', 'Spoke to them', 'Done']
+
+
+def weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+def phone_number(rng):
+    """A phone number in one of the formats seen in the real exports"""
+    number = f"7219 {rng.randint(0, 9999):04d}"
+    return rng.choice([
+        f"020 {number}", f"0207 219 {rng.randint(0, 9999):04d}", f"20{number.replace(' ', '')}",
+        f"004420 {number}", f"01{rng.randint(100, 999)} {rng.randint(100000, 999999)}",
+    ])
+
+
+def make_members(rng, count, house, first_id):
+    """Synthetic members as dicts with the fields the Members XML carries"""
+    members = []
+    for offset in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        if house == 'Commons':
+            display_as = f"{rng.choice(TITLES)}{first} {last}"
+            party = weighted(rng, COMMONS_PARTIES)
+        else:
+            rank = rng.choice(['Lord', 'Baroness'])
+            display_as = f"{rank} {last}" + (f" of {rng.choice(PLACES)}" if rng.random() < 0.5 else '')
+            party = weighted(rng, LORDS_PARTIES)
+        has_phone = rng.random() < 0.95
+        members.append({
+            'id': first_id + offset,
+            'display_as': display_as,
+            'party': party,
+            'house': house,
+            'parliamentary_phone': phone_number(rng) if has_phone else '',
+            'constituency_phone': phone_number(rng) if house == 'Commons' and rng.random() < 0.5 else '',
+            'email': f"{last.lower()}{first_id + offset}@parliament.uk",
+        })
+    return members
+
+
+def write_members_xml(path, members):
+    """Write members in the layout of the Members Data Platform export"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<Members>')
+        for member in members:
+            f.write(
+                f'<Member Member_Id="{member["id"]}"><DisplayAs>{escape(member["display_as"])}</DisplayAs>'
+                f'<Party Id="0">{escape(member["party"])}</Party><House>{member["house"]}</House><Addresses>'
+                '<Address Type_Id="7"><Type>X (formerly Twitter)</Type>'
+                f'<Address1>https://twitter.com/member{member["id"]}</Address1></Address>'
+            )
+            for address_type, phone in [
+                ('Parliamentary office', member['parliamentary_phone']),
+                ('Constituency office', member['constituency_phone']),
+            ]:
+                if phone or address_type == 'Parliamentary office':
+                    f.write(
+                        f'<Address Type_Id="1"><Type>{address_type}</Type><Phone>{phone}</Phone>'
+                        f'<Email>{member["email"]}</Email></Address>'
+                    )
+            f.write('</Addresses></Member>')
+        f.write('</Members>')
+
+
+def write_csv(path, columns, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def iso(date):
+    return date.isoformat() if date else ''
+
+
+def write_government_positions(directory, rng, members, scale):
+    """Write all eleven government positions CSVs, linked to the members"""
+    os.makedirs(directory, exist_ok=True)
+    new_id = lambda: str(uuid.UUID(int=rng.getrandbits(128)))
+
+    organisations = [(new_id(), f"Department for {subject}", subject[:4].upper()) for subject in POST_SUBJECTS]
+    write_csv(os.path.join(directory, 'organisation.csv'), ['id', 'name', 'short_name', 'start_date', 'end_date'],
+              [(org_id, name, short, '1990-01-01', '') for org_id, name, short in organisations])
+    write_csv(os.path.join(directory, 'organisation_link.csv'),
+              ['id', 'predecessor_organisation_id', 'successor_organisation_id', 'type', 'link_start_date', 'link_end_date'],
+              [(new_id(), organisations[0][0], organisations[1][0], 'Name change', '2021-09-20', '2021-09-20')])
+    write_csv(os.path.join(directory, 'event.csv'), ['id', 'name', 'type', 'date'],
+              [(new_id(), '2024 general election', 'General election', '2024-07-04')])
+
+    posts = []
+    for index in range(POSTS_PER_SCALE * scale):
+        prefix, rank, value = rng.choice(POST_PREFIXES)
+        org_id, _, _ = rng.choice(organisations)
+        name = f"{prefix} {rng.choice(POST_SUBJECTS)}" + (f" {index}" if index >= len(POST_SUBJECTS) else '')
+        posts.append((new_id(), '', org_id, name, name, rank, value))
+    posts.append((new_id(), '', organisations[0][0], 'Prime Minister', 'Prime Minister', 'PM', 0))
+    write_csv(os.path.join(directory, 'post.csv'),
+              ['id', 'id_ifg_website', 'organisation_id', 'name', 'display_name', 'rank_equivalence',
+               'rank_equivalence_value'], posts)
+    write_csv(os.path.join(directory, 'post_relationship.csv'), ['id', 'post_id', 'group_name', 'group_seniority'],
+              [(new_id(), post[0], rng.choice(POST_SUBJECTS), 'MoS/PUSS') for post in posts[:len(posts) // 2]])
+
+    # About a third of members have held a government post at some point
+    people = []
+    for member in rng.sample(members, len(members) // 3):
+        person_id = new_id()
+        name = member['display_as']
+        people.append((person_id, float(member['id']), '', name, name, name, name.split()[-1], rng.choice('MF'), '', ''))
+    write_csv(os.path.join(directory, 'person.csv'),
+              ['id', 'id_parliament', 'id_ifg_website', 'name', 'display_name', 'normalized_name', 'short_name',
+               'gender', 'start_date', 'end_date'], people)
+
+    constituencies = [(new_id(), rng.randint(1, 5000), f"{place} {index}") for index, place in
+                      enumerate(PLACES * scale * 4)]
+    write_csv(os.path.join(directory, 'constituency.csv'), ['id', 'id_parliament', 'name'], constituencies)
+    representations = [(new_id(), person[0], 'Commons', '', rng.choice(constituencies)[0], '2019-12-12', '')
+                       for person in people]
+    write_csv(os.path.join(directory, 'representation.csv'),
+              ['id', 'person_id', 'house', 'type', 'constituency_id', 'start_date', 'end_date'], representations)
+    write_csv(os.path.join(directory, 'representation_characteristics.csv'),
+              ['id', 'representation_id', 'party', 'start_date', 'end_date'],
+              [(new_id(), representation[0], 'Labour', '2019-12-12', '') for representation in representations])
+
+    appointments = []
+    characteristics = []
+    epoch = datetime.date(1990, 1, 1)
+    for _ in range(APPOINTMENTS_PER_SCALE * scale):
+        start = epoch + datetime.timedelta(days=rng.randint(0, 13000))
+        end = start + datetime.timedelta(days=rng.randint(30, 2000))
+        if end > datetime.date(2025, 6, 1) and rng.random() < 0.8:
+            end = None
+        appointment_id = new_id()
+        appointments.append((appointment_id, rng.choice(people)[0], rng.choice(posts)[0], iso(start), iso(end)))
+        characteristics.append((new_id(), appointment_id, weighted(rng, CABINET_STATUSES), False, False, '',
+                                iso(start), iso(end)))
+    write_csv(os.path.join(directory, 'appointment.csv'), ['id', 'person_id', 'post_id', 'start_date', 'end_date'],
+              appointments)
+    write_csv(os.path.join(directory, 'appointment_characteristics.csv'),
+              ['id', 'appointment_id', 'cabinet_status', 'is_acting', 'is_on_leave', 'leave_reason', 'start_date',
+               'end_date'], characteristics)
+
+
+def name_variant(rng, name):
+    """A name as it might appear in a hand-maintained list: exact, re-titled or misspelt"""
+    roll = rng.random()
+    if roll < 0.5:
+        return name
+    if roll < 0.7:
+        return f"Rt Hon. {name}"
+    if roll < 0.85 and len(name) > 6:
+        position = rng.randrange(1, len(name) - 1)
+        return name[:position] + name[position + 1:]
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def write_name_list(path, rng, members, count, heading):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"# {heading}\n")
+        for member in rng.choices(members, k=count):
+            f.write(name_variant(rng, member['display_as']) + '\n')
+
+
+def write_lords_sheets(directory, rng, lords, scale):
+    """Write the Lords division export and phonebanking sheet"""
+    voters = rng.sample(lords, min(len(lords), DIVISION_VOTES_PER_SCALE * scale))
+    with open(os.path.join(directory, 'division-lords.csv'), 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(['Member', 'Party', 'Type of Peerage', 'Vote'])
+        for lord in voters:
+            writer.writerow([lord['display_as'], lord['party'], 'Life peer', rng.choice(VOTES)])
+
+    rows = []
+    for lord in rng.sample(lords, min(len(lords), PHONEBANKING_PER_SCALE * scale)):
+        rank, _, rest = lord['display_as'].partition(' ')
+        rows.append((
+            rng.choice(OUTCOMES), lord['parliamentary_phone'], lord['display_as'], 'FALSE', lord['email'],
+            lord['party'], rng.randint(1, 4), '', '', lord['id'], rank, rest, lord['parliamentary_phone'], '', '',
+        ))
+    write_csv(os.path.join(directory, 'phonebanking-lords.csv'), [
+        'Mark when done ⬇️⬇️⬇️', 'Phone number (might be a switchboard)', 'Full name', 'Email sent?',
+        "Email address (only if you can't reach them by phone)", 'Party', 'Priority', 'Position',
+        'Government position', 'id_parliament', 'First name', 'Last name', 'Parliamentary phone number',
+        'Constituency phone number', 'Constituency email address',
+    ], rows)
+
+
+def generate(scale, root, seed=0):
+    """Write a synthetic data/ directory under root at the given scale"""
+    rng = random.Random(seed * 1000 + scale)
+    data_dir = os.path.join(root, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+
+    mps = make_members(rng, MPS_PER_SCALE * scale, 'Commons', 1)
+    lords = make_members(rng, LORDS_PER_SCALE * scale, 'Lords', len(mps) + 1)
+    write_members_xml(os.path.join(data_dir, 'mp_contact_details.xml'), mps)
+    write_members_xml(os.path.join(data_dir, 'lords_contact_details.xml'), lords)
+
+    write_government_positions(os.path.join(data_dir, 'government-positions'), rng, mps + lords, scale)
+
+    write_name_list(os.path.join(data_dir, 'exclude_mps.txt'), rng, mps, EXCLUDE_MPS_PER_SCALE * scale,
+                    'Synthetic known supporters')
+    write_name_list(os.path.join(data_dir, 'exclude_lords.txt'), rng, lords, EXCLUDE_LORDS_PER_SCALE * scale,
+                    'Synthetic exclusions')
+    write_name_list(os.path.join(data_dir, 'gotv_lords.txt'), rng, lords, GOTV_LORDS_PER_SCALE * scale,
+                    'Synthetic GOTV list')
+    write_lords_sheets(data_dir, rng, lords, scale)
+    return data_dir
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate synthetic pipeline inputs")
+    parser.add_argument('scale', type=int, help="multiple of the real data size")
+    parser.add_argument('root', help="directory to write data/ into")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(f"Generated {generate(args.scale, args.root, args.seed)}")
@@ -0,0 +1,188 @@
+"""
+Time every pipeline stage on synthetic data at several scales.
+
+For each scale a synthetic data/ directory is generated (see generate.py)
+and each stage script is run against it in a fresh interpreter. Every
+repeat gets its own empty cache directory: the stage runs once cold, doing
+the full work, then once warm against the caches the cold run left. Wall
+time and peak memory for both are written to a JSON file that can be
+compared between versions:
+
+    python benchmarks/run.py --scales 1 10 100
+    python benchmarks/run.py --scales 1 10 --compare benchmarks/results/old.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import pipeline  # noqa: E402
+from generate import generate  # noqa: E402
+
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, 'results')
+
+# Every cache a stage can read or write, as env var -> path in a cache dir
+CACHE_PATHS = {
+    'ROSTER_CACHE_DIR': 'roster',
+    'NAME_LIST_CACHE_DIR': 'name-lists',
+    'POSITIONS_SNAPSHOT': 'government-positions.pkl',
+    'FETCH_CACHE_DIR': 'responses',
+}
+
+RUNS = ['cold', 'warm']
+
+
+def benchmark_stages():
+    """The stages benchmarked, in the order they have to run"""
+    return [stage for stage in pipeline.STAGES if not stage.get('fetch')]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def time_script(script, cwd, env):
+    """Run a script, returning its wall time, peak RSS in KiB and exit code"""
+    # stderr goes to a file, not a pipe, so a chatty stage can't fill the
+    # pipe and block while it is waited on
+    with tempfile.TemporaryFile() as stderr_file:
+        started = time.perf_counter()
+        with subprocess.Popen(
+            [sys.executable, os.path.join(REPO_DIR, script)],
+            cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=stderr_file,
+        ) as process:
+            _, status, usage = os.wait4(process.pid, 0)
+            elapsed = time.perf_counter() - started
+            # Reaped by wait4, so Popen's own wait() on exit returns this
+            process.returncode = os.waitstatus_to_exitcode(status)
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode(errors='replace')
+    return elapsed, usage.ru_maxrss, process.returncode, stderr
+
+
+def cache_env(env, cache_dir):
+    """env with every cache pointed into cache_dir"""
+    return dict(env, **{var: os.path.join(cache_dir, path) for var, path in CACHE_PATHS.items()})
+
+
+def summarise(timings, peak_rss, prefix):
+    return {
+        f'{prefix}_seconds': sorted(timings)[len(timings) // 2] if timings else None,
+        f'{prefix}_min_seconds': min(timings) if timings else None,
+        f'{prefix}_peak_rss_kb': peak_rss,
+    }
+
+
+def run_scale(scale, repeats, seed, keep):
+    """Benchmark every stage at one scale"""
+    root = tempfile.mkdtemp(prefix=f'bench-{scale}x-')
+    print(f"\n📦 Generating {scale}x synthetic data in {root}...")
+    started = time.perf_counter()
+    generate(scale, root, seed)
+    print(f"   generated in {time.perf_counter() - started:.1f}s")
+
+    env = dict(os.environ, ROSTER_CACHE='on', PYTHONHASHSEED='0')
+    results = []
+    for stage in benchmark_stages():
+        timings = {run: [] for run in RUNS}
+        peak_rss = {run: 0 for run in RUNS}
+        failed = False
+        for _ in range(repeats):
+            with tempfile.TemporaryDirectory(prefix='bench-cache-') as cache_dir:
+                for run in RUNS:
+                    elapsed, rss, returncode, stderr = time_script(stage['script'], root, cache_env(env, cache_dir))
+                    if returncode != 0:
+                        print(f"❌ {stage['name']} failed {run} at {scale}x:\n{stderr}")
+                        failed = True
+                        break
+                    timings[run].append(elapsed)
+                    peak_rss[run] = max(peak_rss[run], rss)
+            if failed:
+                break
+        result = {
+            'stage': stage['name'],
+            'scale': scale,
+            'runs': len(timings['cold']),
+            **summarise(timings['cold'], peak_rss['cold'], 'cold'),
+            **summarise(timings['warm'], peak_rss['warm'], 'warm'),
+            'ok': not failed,
+        }
+        results.append(result)
+        if result['ok']:
+            print(f"   {stage['name']:<15} cold {result['cold_seconds']:8.2f}s {peak_rss['cold'] / 1024:6.0f} MiB"
+                  f"   warm {result['warm_seconds']:8.2f}s {peak_rss['warm'] / 1024:6.0f} MiB")
+
+    if not keep:
+        subprocess.run(['rm', '-rf', root])
+    return results
+
+
+def compare(results, baseline_path):
+    """Print each stage's time relative to a previous results file"""
+    with open(baseline_path) as f:
+        baseline = {(r['stage'], r['scale']): r for r in json.load(f)['results']}
+    print(f"\n📈 Compared with {baseline_path}:")
+    for result in results:
+        previous = baseline.get((result['stage'], result['scale']))
+        for run in RUNS:
+            key = f'{run}_seconds'
+            if not previous or not previous.get(key) or not result[key]:
+                continue
+            ratio = result[key] / previous[key]
+            flag = "  ⚠️ slower" if ratio > 1.2 else ""
+            print(f"   {result['stage']:<15} {result['scale']:>4}x {run}  {previous[key]:8.2f}s -> "
+                  f"{result[key]:8.2f}s  ({ratio:.2f}x){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic data")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10], help="data size multiples")
+    parser.add_argument('--repeats', type=int, default=1, help="cold and warm runs per stage; the medians are reported")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="results file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument('--compare', help="previous results file to compare against")
+    parser.add_argument('--keep', action='store_true', help="keep the generated data directories")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = []
+    for scale in args.scales:
+        results.extend(run_scale(scale, args.repeats, args.seed, args.keep))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{commit}-{datetime.datetime.now().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeats': args.repeats,
+            'results': results,
+        }, f, indent=2)
+    print(f"\n✅ Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
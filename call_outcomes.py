@@ -0,0 +1,390 @@
+"""
+Merge volunteers' call outcomes into a store, and refresh the call queue
+from it without re-ranking.
+
+Volunteers note each call in free text in the sheet's outcome column ("Mark
+when done ⬇️⬇️⬇️" in data/phonebanking-lords.csv): "Voicemail left", "email
+only", "❤️ Was really receptive", ... Every export passed in is classified
+and merged into the outcome store (.cache/outcomes.json, or
+OUTCOME_STORE), keyed by id_parliament:
+
+- completed: spoken to, or otherwise settled; dropped from the queue
+- email_only: can't be reached by phone; dropped from the queue
+- voicemail / no_answer: held back, then re-queued once their back-off
+  (doubling with every attempt) has passed
+- other: notes that don't say, left in the queue
+
+A member's attempt count only goes up when their note changes, so
+re-ingesting the same export is harmless; it only re-classifies notes
+already in the store, e.g. after OUTCOME_PATTERNS change.
+
+The queue is the ranked sheet with dropped and held members taken out, in
+the same order, plus their attempts and last outcome. The store remembers
+each queue's ranked order and when it was refreshed, so a refresh only
+touches the rows of members whose outcome changed in this run or whose
+back-off has ended since; the ranked sheet is only read again to put a
+member back in the queue, or to rebuild it when the sheet itself changed.
+It can be re-run mid-session as exports come in.
+
+    python call_outcomes.py data/phonebanking-lords.csv --ranked output/ranked_contact_lords_gotv.csv
+    python call_outcomes.py --check    # OUTCOME_PATTERNS against real example notes
+"""
+
+import argparse
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from contact_sheets import CONTACT_COLUMNS, read_contacts
+from instrumentation import start_stage
+from name_keys import NameIndex
+from output_files import check_output, check_rows, read_manifest, write_csv
+
+STORE_PATH = os.environ.get('OUTCOME_STORE', '.cache/outcomes.json')
+
+# Columns volunteers record outcomes in, first present wins
+OUTCOME_COLUMNS = ['Mark when done ⬇️⬇️⬇️', 'Outcome', 'Call outcome']
+EMAIL_SENT_COLUMN = 'Email sent?'
+
+# Outcome of a note: the first pattern that matches its lower-cased text.
+# Voicemail and no answer come before email only, so "voicemail" isn't read
+# as an email and a member is re-queued rather than dropped when in doubt.
+OUTCOME_PATTERNS = [
+    ('completed', r"^done\b|spoke|spoken|❤|🔥|❌|receptive|supportive|on the fence|\battend|can'?t make it"
+                  r"|cannot attend|not in (?:the )?(?:house|chamber)|won'?t be in|skipping|whip"),
+    ('voicemail', r"(?<!no )voice ?mail|voice message|vociemail|vocie|\bvm\b|message left|left (?:a )?message"),
+    ('no_answer', r"\bno ?n?answer|didn'?t answer|did not answer|cut ?-?off|cut out|didn'?t go|did not go"
+                  r"|doesn'?t go|hangs? up|turned off|unavailable|try (?:again )?later|^call+ing$|^switch ?board$"
+                  r"|no voice ?mail"),
+    ('email_only', r"\be-? ?mail(?:ed|ing)?\b|@|no (?:direct )?(?:phone|number|ext|deets|details|record)|not working"
+                   r"|doesn'?t (?:work|connect|have a (?:phone|number))|not connecting|extension|contacted by phone"),
+]
+
+# Notes from data/phonebanking-lords.csv and the outcome each should get,
+# checked by python call_outcomes.py --check
+OUTCOME_EXAMPLES = [
+    ("Is attending - writing a speech", 'completed'),
+    ("❤️ Was really receptive", 'completed'),
+    ("Away - cannot attend", 'completed'),
+    ("can't make it", 'completed'),
+    ("not in chamber today", 'completed'),
+    ("Former police officer, skipping", 'completed'),
+    ("Fully supportive, will not be voting with the government!!❤️", 'completed'),
+    ("Done - this lord speaker doesnt get a vote apparently and has to stay neutral", 'completed'),
+    ("Spoke to Earl but line disconnected not attening today", 'completed'),
+    ("email only. spoke to their assistant were sympathetic", 'completed'),
+    ("Voicemail", 'voicemail'),
+    ("voicemail left", 'voicemail'),
+    ("Left voicemail", 'voicemail'),
+    ("straight to voicemail", 'voicemail'),
+    ("goes to voicemail - not left one", 'voicemail'),
+    ("no answer straight to voicemail", 'voicemail'),
+    ("vociemail left", 'voicemail'),
+    ("left voice mail", 'voicemail'),
+    ("vocie message left", 'voicemail'),
+    ("message left with assistant", 'voicemail'),
+    ("Lost connection because he was on the underground- left VM - abstaining 'should be done individually ' "
+     "not sure what that means but he hung up", 'voicemail'),
+    ("No answer", 'no_answer'),
+    ("nonanswer", 'no_answer'),
+    ("No voicemail facility", 'no_answer'),
+    ("Immediate cut-off", 'no_answer'),
+    ("call didnt go thro", 'no_answer'),
+    ("hangs up automatically", 'no_answer'),
+    ("switchboard", 'no_answer'),
+    ("callling", 'no_answer'),
+    ("got through switchboard but unavailable", 'no_answer'),
+    ("did not answer try again later (12:38)", 'no_answer'),
+    ("Email only", 'email_only'),
+    ("e mail only", 'email_only'),
+    ("Email o ly", 'email_only'),
+    ("Contactholmember@parliament.uk", 'email_only'),
+    ("answered by staff member who can't put you through - try emailing", 'email_only'),
+    ("switch board - only contacted via email", 'email_only'),
+    ("tried calling, phone apparently \"not connecting\" will email now.", 'email_only'),
+    ("Phone number not working", 'email_only'),
+    ("No parlimentry extension number", 'email_only'),
+    ("no deets", 'email_only'),
+    ("unable to be contacted by phone?", 'email_only'),
+    ("Number not parlimentary office, but in London", 'other'),
+    ("got put through to a corporate speaking agency asking if I want to book her", 'other'),
+]
+
+# Outcomes that take a member out of the queue for good
+DONE_OUTCOMES = {'completed', 'email_only'}
+
+# Minutes before the first retry; doubles with each further attempt
+BACKOFF_MINUTES = {'voicemail': 120, 'no_answer': 30}
+
+
+def classify_outcomes(notes):
+    """Outcome of each note, '' where there is no note"""
+    text = notes.fillna('').astype(str).str.strip().str.lower()
+    conditions = [text.str.contains(pattern, regex=True) for _, pattern in OUTCOME_PATTERNS]
+    outcomes = np.select(conditions, [outcome for outcome, _ in OUTCOME_PATTERNS], default='other')
+    return pd.Series(np.where(text == '', '', outcomes), index=notes.index)
+
+
+def check_patterns(examples=OUTCOME_EXAMPLES):
+    """The examples OUTCOME_PATTERNS classify differently than expected, as (note, expected, got)"""
+    notes = pd.Series([note for note, _ in examples], dtype=object)
+    return [
+        (note, expected, got)
+        for (note, expected), got in zip(examples, classify_outcomes(notes))
+        if got != expected
+    ]
+
+
+def load_store(path=STORE_PATH):
+    if not os.path.exists(path):
+        return {'members': {}, 'queues': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        store = json.load(f)
+    store.setdefault('queues', {})
+    return store
+
+
+def save_store(store, path=STORE_PATH):
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, prefix=os.path.basename(path) + '.',
+                                     suffix='.tmp', delete=False) as f:
+        json.dump(store, f, indent=2, sort_keys=True, ensure_ascii=False)
+    os.replace(f.name, path)
+
+
+def read_export(path, roster=None):
+    """
+    id_parliament, note and email flag of each noted row of an export.
+
+    Rows without an id_parliament are resolved by name against roster (a
+    contact sheet) if given.
+    """
+    df = pd.read_csv(path, dtype=str)
+    column = next((name for name in OUTCOME_COLUMNS if name in df.columns), None)
+    if column is None:
+        raise ValueError(f"{path} has none of the outcome columns {OUTCOME_COLUMNS}")
+
+    ids = pd.to_numeric(df['id_parliament'], errors='coerce') if 'id_parliament' in df.columns \
+        else pd.Series(np.nan, index=df.index)
+    if roster is not None and ids.isna().any() and 'Full name' in df.columns:
+        index = NameIndex(roster['Full name'].tolist(), roster['id_parliament'].tolist())
+        ids = ids.fillna(df['Full name'].map(index.lookup).astype(float))
+
+    export = pd.DataFrame({
+        'id_parliament': ids.astype('Int64'),
+        'note': df[column].fillna('').str.strip(),
+        'email_sent': df.get(EMAIL_SENT_COLUMN, pd.Series('', index=df.index)).fillna('').str.upper() == 'TRUE',
+    })
+    unresolved = export['id_parliament'].isna() & (export['note'] != '')
+    if unresolved.any():
+        print(f"⚠️  {unresolved.sum()} noted rows in {path} couldn't be matched to a member")
+    return export[export['id_parliament'].notna() & ((export['note'] != '') | export['email_sent'])]
+
+
+def ingest(store, export, at):
+    """Merge an export's outcomes into the store, returning the ids that changed"""
+    export = export.assign(outcome=classify_outcomes(export['note']))
+    members = store['members']
+    changed = []
+    for member_id, note, email_sent, outcome in export[['id_parliament', 'note', 'email_sent', 'outcome']].itertuples(
+            index=False):
+        key = str(member_id)
+        record = members.get(key, {'attempts': 0, 'note': '', 'outcome': '', 'email_sent': False})
+        if note == record['note'] and email_sent == record['email_sent']:
+            # Same note, but classified afresh in case the patterns changed
+            if outcome != record['outcome']:
+                record['outcome'] = outcome
+                changed.append(key)
+            continue
+        if note != record['note']:
+            record.update(note=note, outcome=outcome, attempts=record['attempts'] + 1, last_call=at.isoformat())
+        record['email_sent'] = bool(email_sent)
+        members[key] = record
+        changed.append(key)
+    return changed
+
+
+def due_at(record):
+    """When a held member can be called again, or None if they aren't held"""
+    minutes = BACKOFF_MINUTES.get(record['outcome'])
+    if minutes is None:
+        return None
+    return datetime.fromisoformat(record['last_call']) + timedelta(minutes=minutes * 2 ** (record['attempts'] - 1))
+
+
+def queue_status(ids, store, now):
+    """Status of each id: 'queued', 'requeued', 'held' or one of DONE_OUTCOMES"""
+    statuses = {}
+    for key, record in store['members'].items():
+        if record['outcome'] in DONE_OUTCOMES:
+            statuses[key] = record['outcome']
+        elif due_at(record) is not None:
+            statuses[key] = 'held' if due_at(record) > now else 'requeued'
+    return ids.astype(str).map(statuses).fillna('queued')
+
+
+QUEUE_COLUMNS = {'Attempts': 'int64', 'Last outcome': 'str'}
+
+
+def queue_rows(ranked, store):
+    """Rows of the ranked sheet with their attempts and last outcome"""
+    records = ranked['id_parliament'].astype(str).map(store['members'])
+    return ranked.assign(**{
+        'Attempts': records.map(lambda record: record['attempts'] if isinstance(record, dict) else 0).astype('int64'),
+        'Last outcome': records.map(lambda record: record['note'] if isinstance(record, dict) else ''),
+    })
+
+
+def read_queue(path):
+    manifest = check_output(path)
+    queue = pd.read_csv(path, dtype={**CONTACT_COLUMNS, **QUEUE_COLUMNS}, keep_default_na=False)
+    check_rows(path, manifest, len(queue))
+    return queue
+
+
+def sheet_version(path):
+    """The SHA-256 from a sheet's manifest, or its size and mtime without one"""
+    manifest = read_manifest(path)
+    if manifest is not None:
+        return manifest['sha256']
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def queue_path(ranked_path):
+    stem = os.path.splitext(os.path.basename(ranked_path))[0]
+    return os.path.join(os.path.dirname(ranked_path), f"{stem}_queue.csv")
+
+
+def update_queue(queue_file, state, ranked_path, store, now, changed):
+    """
+    Update a queue written from the same ranked sheet, returning its frame,
+    or None if nothing in it changed.
+
+    Only members in changed, and held members whose back-off ended between
+    the last refresh and now, are looked at again.
+    """
+    refreshed_at = datetime.fromisoformat(state['refreshed_at'])
+    order = {key: position for position, key in enumerate(state['ids'])}
+    affected = {key for key in changed if key in order}
+    for key, record in store['members'].items():
+        due = due_at(record) if key in order else None
+        if due is not None and refreshed_at < due <= now:
+            affected.add(key)
+    if not affected:
+        return None
+
+    queue = read_queue(queue_file)
+    keys = queue['id_parliament'].astype(str)
+    affected = pd.Series(sorted(affected), dtype=object)
+    wanted = set(affected[queue_status(affected, store, now).isin(['queued', 'requeued'])])
+
+    # Members staying in the queue only need their attempts and note updated
+    staying = keys.isin(wanted).to_numpy()
+    updated = queue_rows(queue.loc[staying, ['id_parliament']], store)
+    for column in QUEUE_COLUMNS:
+        queue.loc[staying, column] = updated[column]
+    queue = queue[~keys.isin(affected).to_numpy() | staying]
+
+    # Members coming back need their rows from the ranked sheet
+    returning = wanted - set(keys)
+    if returning:
+        ranked = read_contacts(ranked_path)
+        queue = pd.concat([queue, queue_rows(ranked[ranked['id_parliament'].astype(str).isin(returning)], store)])
+    positions = queue['id_parliament'].astype(str).map(order).to_numpy()
+    return queue.iloc[np.argsort(positions, kind='stable')]
+
+
+def refresh_queue(ranked_path, store, now, output_path=None, changed=None):
+    """
+    Write the call queue for a ranked sheet, returning the count of each status.
+
+    changed is the ids ingest() reported since the store was last saved.
+    If it is given and the queue was last written from the same ranked sheet
+    no later than now, only the rows of those members and of members whose
+    back-off has ended are updated; otherwise the queue is rebuilt.
+    """
+    output_path = output_path or queue_path(ranked_path)
+    ranked_version = sheet_version(ranked_path)
+    state = store['queues'].get(output_path)
+
+    incremental = (
+        changed is not None and state is not None and state['ranked'] == ranked_version
+        and now >= datetime.fromisoformat(state['refreshed_at']) and read_manifest(output_path) is not None
+    )
+    if incremental:
+        ids = pd.Series(state['ids'], dtype=object)
+        queue = update_queue(output_path, state, ranked_path, store, now, changed)
+        if queue is not None:
+            write_csv(queue, output_path)
+            print(f"✅ Call queue updated: {output_path} ({len(queue)} of {len(ids)} contacts)")
+        else:
+            print(f"✅ Call queue unchanged: {output_path}")
+    else:
+        ranked = read_contacts(ranked_path)
+        ids = ranked['id_parliament'].astype(str)
+        status = queue_status(ids, store, now)
+        queue = queue_rows(ranked[status.isin(['queued', 'requeued']).to_numpy()], store)
+        write_csv(queue, output_path)
+        print(f"✅ Call queue created: {output_path} ({len(queue)} of {len(ranked)} contacts)")
+
+    store['queues'][output_path] = {
+        'ranked': ranked_version,
+        'refreshed_at': now.isoformat(),
+        'ids': ids.tolist(),
+    }
+    return queue_status(ids, store, now).value_counts().to_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge call outcomes and refresh the call queue")
+    parser.add_argument('exports', nargs='*', help="volunteer sheets with call outcomes")
+    parser.add_argument('--ranked', action='append', default=[],
+                        help="ranked sheet to refresh the queue of (repeatable)")
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--at', type=datetime.fromisoformat,
+                        help="time of the calls in the exports and of the refresh (default now)")
+    parser.add_argument('--check', action='store_true', help="check OUTCOME_PATTERNS against OUTCOME_EXAMPLES")
+    args = parser.parse_args()
+
+    if args.check:
+        mismatches = check_patterns()
+        for note, expected, got in mismatches:
+            print(f"❌ {note!r}: expected {expected}, got {got}")
+        print(f"{len(OUTCOME_EXAMPLES) - len(mismatches)} of {len(OUTCOME_EXAMPLES)} example notes classified as expected")
+        raise SystemExit(1 if mismatches else 0)
+    now = args.at or datetime.now()
+
+    with start_stage('call_outcomes') as metrics:
+        store = load_store(args.store)
+        roster = read_contacts(args.ranked[0]) if args.ranked else None
+        changed = set()
+        for path in args.exports:
+            export = read_export(path, roster)
+            metrics.rows_in = (metrics.rows_in or 0) + len(export)
+            export_changed = ingest(store, export, args.at or datetime.fromtimestamp(os.path.getmtime(path)))
+            print(f"Merged {len(export)} outcomes from {path} ({len(export_changed)} new or changed)")
+            changed.update(export_changed)
+        metrics.count('changed_outcomes', len(changed))
+
+        outcomes = pd.Series([record['outcome'] for record in store['members'].values()], dtype=object)
+        print(f"📒 {len(outcomes)} members in the outcome store:")
+        for outcome, count in outcomes.value_counts().items():
+            print(f"  {outcome}: {count}")
+
+        for ranked_path in args.ranked:
+            for status, count in refresh_queue(ranked_path, store, now, changed=changed).items():
+                print(f"  {status}: {count}")
+                metrics.count(f"queue.{status}", count)
+        # The outcomes and the queues refreshed from them are saved together
+        save_store(store, args.store)
+        metrics.finish(rows_out=len(store['members']))
+
+
+if __name__ == '__main__':
+    main()
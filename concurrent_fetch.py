@@ -0,0 +1,137 @@
+"""
+Run independent fetches concurrently, with timeouts and retries.
+
+Each request is retried with exponential backoff when it raises or takes
+longer than the timeout, and its latency is recorded so slow queries show
+up over time.
+"""
+
+import datetime
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = int(os.environ.get('FETCH_WORKERS', 4))
+TIMEOUT = float(os.environ.get('FETCH_TIMEOUT', 120))
+RETRIES = int(os.environ.get('FETCH_RETRIES', 3))
+BACKOFF = float(os.environ.get('FETCH_BACKOFF', 2))
+MAX_IN_FLIGHT = int(os.environ.get('FETCH_MAX_IN_FLIGHT', MAX_WORKERS))
+
+LATENCY_LOG = os.environ.get('FETCH_LATENCY_LOG', '.cache/fetch-latency.jsonl')
+
+
+class FetchFailed(RuntimeError):
+    """Raised when a request still fails after all its retries"""
+
+
+def run_attempt(call, timeout, slots=None):
+    """
+    call()'s result, or raise TimeoutError if it takes longer than timeout.
+
+    The call runs on a daemon thread of its own, so the timeout starts when
+    it does, and an attempt that hangs is abandoned without holding up the
+    process exiting. If slots (a semaphore) is given, the attempt holds one
+    until its thread finishes, abandoned or not, so hung attempts can't pile
+    up: a retry waits up to timeout for a slot and times out if none frees.
+    """
+    if slots is not None and not slots.acquire(timeout=timeout):
+        raise TimeoutError(f"no free fetch slot within {timeout:g}s")
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = call()
+        except BaseException as e:
+            outcome['error'] = e
+        finally:
+            if slots is not None:
+                slots.release()
+
+    thread = threading.Thread(target=run, name='fetch-attempt', daemon=True)
+    try:
+        thread.start()
+    except BaseException:
+        if slots is not None:
+            slots.release()
+        raise
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"timed out after {timeout:g}s")
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
+def call_with_retries(name, call, timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF, slots=None):
+    """
+    Call call() until it succeeds within timeout, at most retries times.
+
+    Waits backoff, 2 * backoff, 4 * backoff... seconds between attempts.
+    Each attempt holds one of slots, if given (see run_attempt).
+    Returns the result and a latency record for the request.
+    """
+    started = time.perf_counter()
+    for attempt in range(1, retries + 1):
+        attempt_started = time.perf_counter()
+        try:
+            result = run_attempt(call, timeout, slots)
+        except Exception as e:
+            reason = str(e) if isinstance(e, TimeoutError) else repr(e)
+            if attempt == retries:
+                raise FetchFailed(f"{name} failed after {retries} attempts: {reason}") from e
+            delay = backoff * 2 ** (attempt - 1)
+            print(f"⚠️  {name}: attempt {attempt} {reason}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        return result, {
+            'name': name,
+            'attempts': attempt,
+            'seconds': round(time.perf_counter() - attempt_started, 3),
+            'total_seconds': round(time.perf_counter() - started, 3),
+        }
+
+
+def log_latencies(latencies, path=LATENCY_LOG):
+    """Append latency records to a JSON lines file"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    fetched_at = datetime.datetime.now().isoformat(timespec='seconds')
+    with open(path, 'a') as f:
+        for latency in latencies:
+            f.write(json.dumps({'fetched_at': fetched_at, **latency}) + '\n')
+
+
+def fetch_all(requests, max_workers=MAX_WORKERS, timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF,
+              max_in_flight=MAX_IN_FLIGHT):
+    """
+    Run a dict of name -> zero-argument callable concurrently.
+
+    At most max_workers requests are attempted at once, and at most
+    max_in_flight attempts are running at once, counting timed out attempts
+    that haven't returned yet. Returns a dict of name -> result; raises
+    FetchFailed if any request exhausts its retries.
+    """
+    results = {}
+    latencies = []
+    slots = threading.BoundedSemaphore(max(max_in_flight, 1))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fetch') as pool:
+        futures = {
+            name: pool.submit(call_with_retries, name, call, timeout, retries, backoff, slots)
+            for name, call in requests.items()
+        }
+        try:
+            for name, future in futures.items():
+                results[name], latency = future.result()
+                latencies.append(latency)
+        except FetchFailed:
+            # Don't start requests still waiting for a worker
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    for latency in latencies:
+        retried = f" after {latency['attempts']} attempts" if latency['attempts'] > 1 else ""
+        print(f"⏱️  {latency['name']}: {latency['seconds']:.2f}s{retried}")
+    log_latencies(latencies)
+    return results
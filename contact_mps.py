@@ -1,8 +1,14 @@
-import datetime
 import pandas as pd
-import xml.etree.ElementTree as ET
 import os
-import re
+import members_xml
+from members_xml import Roster, load_members
+from contact_sheets import PHONE_COLUMNS, write_contacts
+from phone_numbers import PhoneIndex, normalize_phones
+from roster_cache import cached
+import gov_positions as positions_data
+from instrumentation import start_stage
+
+metrics = start_stage('contact_mps')
 
 # Create output directory
 output_dir = "output"
@@ -12,153 +18,58 @@ print("Starting contact sheet creation...")
 
 # First, parse the MP contact details XML
 print("Parsing MP contact details XML...")
-contact_data = []
+contact_data = Roster()
 
 try:
-    tree = ET.parse('data/mp_contact_details.xml')
-    root = tree.getroot()
-    
-    # Find all Member elements
-    for member in root.findall('.//Member'):
-        mp_data = {}
-        
-        # Get basic MP info
-        mp_data['id_parliament'] = float(member.get('Member_Id', ''))
-        
-        # Get display name
-        display_as = member.find('DisplayAs')
-        if display_as is not None:
-            mp_data['full_name'] = display_as.text.strip() if display_as.text else ''
-        else:
-            mp_data['full_name'] = ''
-        
-        # Split name into first and last
-        name_parts = mp_data['full_name'].split()
-        if len(name_parts) >= 2:
-            # Remove titles and get actual names
-            filtered_parts = [part for part in name_parts if not part.lower() in ['mr', 'mrs', 'ms', 'dr', 'sir', 'dame', 'lord', 'lady', 'hon', 'rt']]
-            if len(filtered_parts) >= 2:
-                mp_data['first_name'] = filtered_parts[0]
-                mp_data['last_name'] = ' '.join(filtered_parts[1:])
-            else:
-                mp_data['first_name'] = name_parts[0] if name_parts else ''
-                mp_data['last_name'] = ' '.join(name_parts[1:]) if len(name_parts) > 1 else ''
-        else:
-            mp_data['first_name'] = mp_data['full_name']
-            mp_data['last_name'] = ''
-
-        # Get party
-        party_elem = member.find('Party')
-        if party_elem is not None:
-            mp_data['Party'] = party_elem.text.strip()
-        else:
-            mp_data['Party'] = ''
-        
-        # Initialize phone numbers
-        mp_data['parliamentary_phone'] = ''
-        mp_data['constituency_phone'] = ''
-        mp_data['phone_number_1'] = ''
-        
-        # Get addresses and extract phone numbers
-        addresses = member.find('Addresses')
-        if addresses is not None:
-            for address in addresses.findall('Address'):
-                address_type = address.find('Type')
-                if address_type is not None:
-                    type_text = address_type.text
-                    phone_elem = address.find('Phone')
-                    email_elem = address.find('Email')
-                    if phone_elem is not None and phone_elem.text:
-                        phone_number = phone_elem.text.strip()
-                        if phone_number:  # Only add if not empty
-                            if type_text == 'Parliamentary office':
-                                mp_data['parliamentary_phone'] = phone_number
-                            elif type_text == 'Constituency office':
-                                mp_data['constituency_phone'] = phone_number
-                        if email_elem is not None and email_elem.text:
-                            email_address = email_elem.text.strip()
-                            if type_text == 'Parliamentary office':
-                                mp_data['parliamentary_email_address'] = email_address
-                            elif type_text == 'Constituency office':
-                                mp_data['constituency_email_address'] = email_address
-
-        mp_data['phone_number_1'] = mp_data['parliamentary_phone'] or mp_data['constituency_phone']
-        
-        contact_data.append(mp_data)
-        
+    # Stream members rather than building the whole tree, reusing the
+    # previous parse if the export hasn't changed
+    contact_data = cached(
+        'mp_contact_details',
+        ['data/mp_contact_details.xml', members_xml.__file__],
+        lambda: load_members('data/mp_contact_details.xml')
+    )
 except Exception as e:
     print(f"Error parsing XML: {e}")
 
 print(f"Extracted {len(contact_data)} MP contact records from XML")
+metrics.rows_in = len(contact_data)
 
 # Convert to DataFrame
-contact_df = pd.DataFrame(contact_data)
-contact_df['id_parliament'] = contact_df['id_parliament'].astype(int)
-
-print("contact_df")
-print(contact_df[contact_df['id_parliament'] == 4514])
+contact_df = contact_data.to_frame()
 
 # Load government positions data
 print("Loading government positions data...")
 try:
-    # Load the CSV files
-    person_df = pd.read_csv('data/government-positions/person.csv')
-    post_df = pd.read_csv('data/government-positions/post.csv')
-    appointment_df = pd.read_csv('data/government-positions/appointment.csv')
-    
-    # Join to get current government positions
-    # Filter for appointments starting after July 4th 2024 and with no end date
-    current_appointments = appointment_df[
-        # pd.to_datetime(appointment_df['start_date']) >= datetime.datetime(2024, 7, 6)
-        # empty or null
-        (appointment_df['end_date'].isna()) | (appointment_df['end_date'] == '') | (appointment_df['end_date'].str.strip() == '')
-        # or end date is before 2025-06-01
-        | (pd.to_datetime(appointment_df['end_date']) > datetime.datetime(2025, 6, 1))
-    ]
-    
-    # Join with person and post data
-    gov_positions = current_appointments.merge(
-        person_df[['id', 'name', 'id_parliament']], 
-        left_on='person_id', 
-        right_on='id', 
-        how='left'
-    ).merge(
-        post_df[['id', 'name']], 
-        left_on='post_id', 
-        right_on='id', 
-        how='left',
-        suffixes=('_person', '_post')
-    )
-    
-    print(f"Found {len(current_appointments)} current government appointments")
-    print(f"Successfully joined {len(gov_positions)} government positions with names")
-    
+    positions = positions_data.get_positions()
+    as_of = positions_data.as_of_date()
+    # One row per member, all their posts most senior first
+    position_summary = positions.summary_as_of(as_of)
+    print(f"Found {len(position_summary)} members holding government posts on {as_of}")
+    metrics.count('government_post_holders', len(position_summary))
+
 except Exception as e:
     print(f"Error loading government positions: {e}")
-    gov_positions = pd.DataFrame()
-
-# reform id_parliament to int
-gov_positions['id_parliament'] = gov_positions['id_parliament'].astype(int)
+    position_summary = pd.DataFrame()
 
 merged_df = contact_df
 
 # Add government positions
 merged_df['government_position'] = ''
 
-if not gov_positions.empty and not merged_df.empty:
-    # Merge government positions
-    position_matches = merged_df.merge(
-        gov_positions[['name_post', 'id_parliament']], 
+if not position_summary.empty and not merged_df.empty:
+    # Merge government positions, one summary row per MP
+    merged_df = merged_df.drop(columns='government_position').merge(
+        position_summary[['id_parliament', 'government_position']].astype({'id_parliament': int}),
         on='id_parliament',
-        how='left'
+        how='left',
+        validate='many_to_one'
     )
-    
-    # Update government position column
-    merged_df['government_position'] = position_matches['name_post'].fillna('')
-    
+    merged_df['government_position'] = merged_df['government_position'].fillna('')
+
     # Count matches
     matches = (merged_df['government_position'] != '').sum()
     print(f"Matched {matches} MPs with government positions")
+    metrics.count('matched_positions', matches)
 else:
     print("No government position matching performed")
 
@@ -186,9 +97,19 @@ for old_col, new_col in final_columns.items():
     else:
         contact_sheet[new_col] = ''
 
+# Write every phone number one way, so shared lines can be recognised
+for column in PHONE_COLUMNS:
+    contact_sheet[column] = normalize_phones(contact_sheet[column])
+
+phone_index = PhoneIndex(contact_sheet['Phone'], contact_sheet['id_parliament'])
+shared_lines = phone_index.shared()
+metrics.count('shared_lines', len(shared_lines))
+metrics.count('behind_shared_lines', sum(len(ids) for ids in shared_lines.values()))
+
 # Export to CSV
 output_file = os.path.join(output_dir, "contact_mps.csv")
-contact_sheet.to_csv(output_file, index=False)
+write_contacts(contact_sheet, output_file)
+metrics.finish(rows_out=len(contact_sheet))
 
 print(f"\n✅ Contact sheet successfully created: {output_file}")
 print(f"📊 Total records: {len(contact_sheet)}")
@@ -205,4 +126,7 @@ if not contact_sheet.empty:
     print(f"📧 Constituency email addresses: {const_email_count}")
     print(f"🏛️  Government positions: {position_count}")
     print(f"📞 Parliamentary phone numbers: {parl_phone_count}")
-    print(f"🏘️  Constituency phone numbers: {const_phone_count}") 
\ No newline at end of file
+    print(f"🏘️  Constituency phone numbers: {const_phone_count}")
+    print(f"☎️  Shared lines: {len(shared_lines)}")
+    for number, ids in list(shared_lines.items())[:5]:
+        print(f"   {number}: {len(ids)} MPs") 
\ No newline at end of file
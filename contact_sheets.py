@@ -0,0 +1,43 @@
+"""
+Typed reading and writing of the contact sheets (output/contact_*.csv).
+
+Reading with explicit types keeps empty columns (e.g. constituency details
+for the Lords) as text rather than float, keeps phone numbers as written,
+and holds the party as a categorical, so each sheet loads quickly into a
+small frame.
+"""
+
+import pandas as pd
+
+from output_files import check_output, check_rows, write_csv
+
+# Columns of a contact sheet, in order, with their types
+CONTACT_COLUMNS = {
+    'id_parliament': 'int64',
+    'First name': 'str',
+    'Last name': 'str',
+    'Full name': 'str',
+    'Party': 'category',
+    'Government position': 'str',
+    'Phone': 'str',
+    'Parliamentary phone number': 'str',
+    'Constituency phone number': 'str',
+    'Parliamentary email address': 'str',
+    'Constituency email address': 'str',
+}
+
+# Columns holding phone numbers (see phone_numbers.normalize_phones)
+PHONE_COLUMNS = ['Phone', 'Parliamentary phone number', 'Constituency phone number']
+
+
+def read_contacts(path):
+    """Read a contact sheet with its columns typed, checking it is complete"""
+    manifest = check_output(path)
+    df = pd.read_csv(path, dtype=CONTACT_COLUMNS)
+    check_rows(path, manifest, len(df))
+    return df
+
+
+def write_contacts(df, path):
+    """Write a contact sheet with the standard columns, in order"""
+    return write_csv(df[list(CONTACT_COLUMNS)], path)
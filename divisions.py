@@ -0,0 +1,217 @@
+"""
+Voting history across many divisions, held as a member × division matrix.
+
+Each division export (Member, Party, Type of Peerage, Vote, as in
+data/division-lords.csv) is resolved to roster ids by name and stored as
+one column of small integer codes:
+
+    ABSENT = 0    CONTENT = 1 (or Aye)    NOT_CONTENT = 2 (or No)
+
+with tellers counted as voting for their side.
+
+Queries run over the whole matrix at once and return a Series indexed by
+id_parliament, e.g. the members who voted Not Content in at least 3 of a
+set of divisions, or each member's turnout:
+
+    matrix = load_divisions('data/divisions')
+    matrix.voted('Not Content', ['second-reading', 'report'], at_least=2)
+    matrix.turnout()
+
+The matrix is cached (see roster_cache) until a division file, the roster
+or this code changes.
+
+    python divisions.py data/divisions [--roster output/contact_lords.csv]
+"""
+
+import argparse
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from name_keys import NameIndex, name_key
+from name_matcher import NameMatcher
+from roster_cache import cached
+
+ROSTER_PATH = os.path.join('output', 'contact_lords.csv')
+
+ABSENT, CONTENT, NOT_CONTENT = 0, 1, 2
+
+VOTE_CODES = {'content': CONTENT, 'aye': CONTENT, 'not content': NOT_CONTENT, 'no': NOT_CONTENT}
+
+# Fuzzy matches between name keys are only taken when this close
+FUZZY_THRESHOLD = 0.9
+
+
+def vote_code(vote):
+    """Code of a vote given as a code or as written, e.g. 'Not Content'"""
+    if isinstance(vote, (int, np.integer)):
+        return int(vote)
+    try:
+        return VOTE_CODES[vote.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Unknown vote: {vote}") from None
+
+
+def resolve_members(names, roster_names, roster_ids):
+    """
+    Roster id of each name, or None.
+
+    By canonical name key where that identifies one member, otherwise by a
+    close fuzzy match between the keys of members not already matched (full
+    names all share "Lord"/"Baroness", which makes different peers look
+    similar).
+    """
+    name_index = NameIndex(list(roster_names), list(roster_ids))
+    member_ids = [name_index.lookup(name) for name in names]
+    if all(member_id is not None for member_id in member_ids):
+        return member_ids
+
+    matched = set(member_ids)
+    unresolved = [(name, member_id) for name, member_id in zip(roster_names, roster_ids) if member_id not in matched]
+    ids_by_key = {}
+    for name, member_id in unresolved:
+        ids_by_key.setdefault(name_key(name), set()).add(member_id)
+    name_matcher = NameMatcher(list(ids_by_key))
+    for position, name in enumerate(names):
+        if member_ids[position] is None:
+            key = name_key(name)
+            match, _ = name_matcher.match(key, threshold=FUZZY_THRESHOLD)
+            # A key several members share, or an identical key the index
+            # didn't resolve, doesn't say which member is meant
+            if match and match != key and len(ids_by_key[match]) == 1:
+                member_ids[position] = next(iter(ids_by_key[match]))
+    return member_ids
+
+
+def division_files(path):
+    """The division exports at a path: the file itself, or a directory's CSVs"""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, '*.csv')))
+    return [path]
+
+
+def read_division(path):
+    """Member names and vote codes of a division export"""
+    df = pd.read_csv(path, encoding='utf-8-sig', dtype=str, usecols=['Member', 'Vote']).dropna(subset=['Member'])
+    # Tellers ("Teller - Content") are counted with the side they told for
+    votes = df['Vote'].fillna('').str.strip().str.lower().str.replace(r'^teller\s*-\s*', '', regex=True)
+    codes = votes.map(VOTE_CODES)
+    unknown = codes.isna() & (votes != '')
+    if unknown.any():
+        raise ValueError(f"Unknown votes in {path}: {', '.join(sorted(set(votes[unknown])))}")
+    return df['Member'].tolist(), codes.fillna(ABSENT).to_numpy(dtype=np.int8)
+
+
+class VoteMatrix:
+    """
+    Votes of every roster member in every division, as int8 codes.
+
+    Rows are members (member_ids), columns divisions (named after their
+    files); members missing from a division are ABSENT.
+    """
+
+    __slots__ = ('member_ids', 'divisions', 'votes', 'unresolved')
+
+    def __init__(self, member_ids, divisions, votes, unresolved=None):
+        self.member_ids = np.asarray(member_ids, dtype=np.int64)
+        self.divisions = list(divisions)
+        self.votes = votes
+        self.unresolved = unresolved or {}
+
+    def __len__(self):
+        return len(self.member_ids)
+
+    def _columns(self, divisions):
+        if divisions is None:
+            return slice(None)
+        positions = {name: column for column, name in enumerate(self.divisions)}
+        unknown = [name for name in divisions if name not in positions]
+        if unknown:
+            raise ValueError(f"Unknown divisions: {', '.join(unknown)}")
+        return [positions[name] for name in divisions]
+
+    def _series(self, values):
+        return pd.Series(values, index=pd.Index(self.member_ids, name='id_parliament'))
+
+    def counts(self, vote, divisions=None):
+        """Number of the divisions each member cast the vote in"""
+        return self._series((self.votes[:, self._columns(divisions)] == vote_code(vote)).sum(axis=1))
+
+    def voted(self, vote, divisions=None, at_least=1):
+        """Members who cast the vote in at least at_least of the divisions"""
+        return self.counts(vote, divisions) >= at_least
+
+    def turnout(self, divisions=None):
+        """Share of the divisions each member voted in"""
+        votes = self.votes[:, self._columns(divisions)]
+        if votes.shape[1] == 0:
+            return self._series(np.zeros(len(self)))
+        return self._series((votes != ABSENT).mean(axis=1))
+
+
+def build_vote_matrix(paths, roster_names, roster_ids):
+    """Resolve every division export against a roster into a VoteMatrix"""
+    roster_ids = list(roster_ids)
+    exports = [read_division(path) for path in paths]
+    # Members appear in many divisions, so resolve each name once, in one
+    # call over all of them
+    names = list(dict.fromkeys(name for division_names, _ in exports for name in division_names))
+    resolved = dict(zip(names, resolve_members(names, list(roster_names), roster_ids)))
+
+    rows = {member_id: row for row, member_id in enumerate(dict.fromkeys(roster_ids))}
+    votes = np.zeros((len(rows), len(paths)), dtype=np.int8)
+    unresolved = {}
+
+    for column, (path, (names, codes)) in enumerate(zip(paths, exports)):
+        member_ids = [resolved[name] for name in names]
+        found = np.array([member_id is not None for member_id in member_ids], dtype=bool)
+        member_rows = np.array([rows[member_id] for member_id in member_ids if member_id is not None], dtype=np.int64)
+        votes[member_rows, column] = codes[found]
+        if not found.all():
+            unresolved[os.path.splitext(os.path.basename(path))[0]] = [
+                name for name, member_id in zip(names, member_ids) if member_id is None
+            ]
+
+    divisions = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    return VoteMatrix(list(rows), divisions, votes, unresolved)
+
+
+def load_divisions(path, roster_path=ROSTER_PATH):
+    """The VoteMatrix of the division exports at path, against a contact sheet"""
+    paths = division_files(path)
+    if not paths:
+        raise ValueError(f"No division exports found at {path}")
+
+    def build():
+        roster = pd.read_csv(roster_path, usecols=['id_parliament', 'Full name'])
+        matrix = build_vote_matrix(paths, roster['Full name'].tolist(), roster['id_parliament'].tolist())
+        # Cached as plain arrays and lists rather than a VoteMatrix, which
+        # would pickle as __main__.VoteMatrix when this file is run
+        return matrix.member_ids, matrix.divisions, matrix.votes, matrix.unresolved
+
+    code = [os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+            for name in ('divisions.py', 'name_keys.py', 'name_matcher.py')]
+    return VoteMatrix(*cached('divisions', paths + [roster_path] + code, build))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise voting history across division exports")
+    parser.add_argument('path', help="a division export, or a directory of them")
+    parser.add_argument('--roster', default=ROSTER_PATH, help="contact sheet the members are resolved against")
+    args = parser.parse_args()
+
+    matrix = load_divisions(args.path, args.roster)
+    print(f"📊 {len(matrix)} members × {len(matrix.divisions)} divisions")
+    for division, names in matrix.unresolved.items():
+        print(f"⚠️  {division}: {len(names)} members not on the roster")
+    turnout = matrix.turnout()
+    print(f"Voted in at least one division: {(turnout > 0).sum()}")
+    print(f"Mean turnout: {turnout.mean():.1%}")
+    print(f"Voted Not Content at least once: {matrix.voted('Not Content').sum()}")
+    print(f"Voted Content at least once: {matrix.voted('Content').sum()}")
+
+
+if __name__ == '__main__':
+    main()
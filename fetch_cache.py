@@ -0,0 +1,202 @@
+"""
+Record/replay cache for the pdpy calls made by the fetch scripts.
+
+Responses are stored under CACHE_DIR keyed by the call name and its
+parameters (for SPARQL, the query text with whitespace normalised).
+FETCH_MODE picks how they are used:
+
+    cache   reuse responses younger than their TTL, fetch and record otherwise (default)
+    live    always fetch, recording the response
+    replay  serve recorded responses only, never touching the network
+
+Replay mode is backed by ReplayEndpoint, a local stand-in for the pdpy
+functions the fetch scripts call, so they can run offline and in tests.
+
+    python fetch_cache.py           # list recorded responses
+    python fetch_cache.py --prune   # delete expired responses
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+CACHE_DIR = os.environ.get('FETCH_CACHE_DIR', '.cache/responses')
+
+FETCH_MODE = os.environ.get('FETCH_MODE', 'cache')
+
+# Seconds a recorded response stays fresh, per call
+DEFAULT_TTL = int(os.environ.get('FETCH_CACHE_TTL', 24 * 60 * 60))
+TTLS = {
+    'sparql_select': DEFAULT_TTL,
+    'fetch_commons_memberships': DEFAULT_TTL,
+    'fetch_mps_government_roles': DEFAULT_TTL,
+}
+
+
+class ResponseNotRecorded(LookupError):
+    """Raised in replay mode when no response was recorded for a call"""
+
+
+def _normalise(params):
+    """Parameters as they are keyed: SPARQL whitespace doesn't change the query"""
+    normalised = dict(params)
+    if 'query' in normalised:
+        normalised['query'] = ' '.join(normalised['query'].split())
+    return normalised
+
+
+def request_key(name, params):
+    """Cache key for a call and its parameters"""
+    payload = json.dumps([name, _normalise(params)], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _entry_path(name, params):
+    return os.path.join(CACHE_DIR, f"{name}-{request_key(name, params)[:32]}.pkl")
+
+
+def load_response(name, params, ttl=None):
+    """
+    A recorded response for the call, or raise ResponseNotRecorded.
+
+    With a ttl, responses older than ttl seconds count as not recorded.
+    """
+    path = _entry_path(name, params)
+    if not os.path.exists(path):
+        raise ResponseNotRecorded(f"No recorded response for {name} {_normalise(params)}")
+    with open(path, 'rb') as f:
+        entry = pickle.load(f)
+    if ttl is not None and time.time() - entry['recorded_at'] > ttl:
+        raise ResponseNotRecorded(f"Recorded response for {name} has expired")
+    return entry['response']
+
+
+def record_response(name, params, response):
+    """Store a response for later runs"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _entry_path(name, params)
+    entry = {
+        'name': name,
+        'params': _normalise(params),
+        'recorded_at': time.time(),
+        'response': response,
+    }
+    # Concurrent fetches and parallel stages may record the same call at once
+    with tempfile.NamedTemporaryFile('wb', dir=CACHE_DIR, prefix=os.path.basename(path) + '.',
+                                     suffix='.tmp', delete=False) as f:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f.name, path)
+
+
+def cached_fetch(name, params, fetch, mode=None, ttl=None):
+    """Return fetch()'s response for a call, going through the cache according to mode"""
+    mode = mode or FETCH_MODE
+    if ttl is None:
+        ttl = TTLS.get(name, DEFAULT_TTL)
+
+    if mode == 'replay':
+        return load_response(name, params)
+    if mode == 'cache':
+        try:
+            response = load_response(name, params, ttl=ttl)
+            print(f"Using cached response for {name}")
+            return response
+        except ResponseNotRecorded:
+            pass
+    elif mode != 'live':
+        raise ValueError(f"Unknown FETCH_MODE: {mode}")
+
+    response = fetch()
+    record_response(name, params, response)
+    return response
+
+
+class ReplayEndpoint:
+    """Local stand-in for the pdpy calls, serving only recorded responses"""
+
+    def sparql_select(self, query):
+        return load_response('sparql_select', {'query': query})
+
+    def fetch_commons_memberships(self, **kwargs):
+        return load_response('fetch_commons_memberships', kwargs)
+
+    def fetch_mps_government_roles(self, **kwargs):
+        return load_response('fetch_mps_government_roles', kwargs)
+
+
+class CachingClient:
+    """The pdpy calls, with responses recorded and reused according to mode"""
+
+    def __init__(self, mode=None):
+        self.mode = mode
+
+    def sparql_select(self, query):
+        from pdpy import core as pdpy_core
+        return cached_fetch('sparql_select', {'query': query}, lambda: pdpy_core.sparql_select(query), self.mode)
+
+    def fetch_commons_memberships(self, **kwargs):
+        import pdpy
+        return cached_fetch(
+            'fetch_commons_memberships', kwargs, lambda: pdpy.fetch_commons_memberships(**kwargs), self.mode
+        )
+
+    def fetch_mps_government_roles(self, **kwargs):
+        import pdpy
+        return cached_fetch(
+            'fetch_mps_government_roles', kwargs, lambda: pdpy.fetch_mps_government_roles(**kwargs), self.mode
+        )
+
+
+def client(mode=None):
+    """The client the fetch scripts should use for FETCH_MODE (or mode)"""
+    mode = mode or FETCH_MODE
+    if mode == 'replay':
+        return ReplayEndpoint()
+    # Only a client that can go to the network needs pdpy's HTTP stack
+    # loaded; fail here, before any fetch starts, if it isn't installed
+    import pdpy  # noqa: F401
+    return CachingClient(mode)
+
+
+def readable(frame):
+    """pdpy.readable(), imported when a response is post-processed"""
+    import pdpy
+    return pdpy.readable(frame)
+
+
+def filter_dates(frame, **kwargs):
+    """pdpy.filter.filter_dates(), imported when a response is post-processed"""
+    from pdpy import filter as pdpy_filter
+    return pdpy_filter.filter_dates(frame, **kwargs)
+
+
+def list_responses():
+    """Recorded responses as (path, entry) pairs, oldest first"""
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    responses = []
+    for filename in sorted(os.listdir(CACHE_DIR)):
+        if not filename.endswith('.pkl'):
+            continue
+        path = os.path.join(CACHE_DIR, filename)
+        with open(path, 'rb') as f:
+            responses.append((path, pickle.load(f)))
+    return sorted(responses, key=lambda item: item[1]['recorded_at'])
+
+
+if __name__ == '__main__':
+    prune = '--prune' in sys.argv[1:]
+    now = time.time()
+    for path, entry in list_responses():
+        age = now - entry['recorded_at']
+        expired = age > TTLS.get(entry['name'], DEFAULT_TTL)
+        if prune and expired:
+            os.remove(path)
+            print(f"Removed expired {entry['name']} ({age / 3600:.1f}h old)")
+        elif not prune:
+            status = "expired" if expired else "fresh"
+            print(f"{entry['name']}: {age / 3600:.1f}h old, {status} ({os.path.basename(path)})")
@@ -1,9 +1,11 @@
-import datetime
-import pdpy
-from pdpy import filter as pdpy_filter
-from pdpy import core as pdpy_core
 import os
-import pandas as pd
+from gov_positions import as_of_date
+import fetch_cache
+from concurrent_fetch import fetch_all
+from instrumentation import start_stage
+from output_files import write_csv
+
+metrics = start_stage('fetch_mps')
 
 # Create output directory if it doesn't exist
 output_dir = "output"
@@ -40,32 +42,45 @@ query = """
         }}
 """
 
-query_result = pdpy_core.sparql_select(query)
+# Responses are cached (or replayed offline) according to FETCH_MODE
+parliament_data = fetch_cache.client()
+
+# The member query and the memberships are independent, so fetch them
+# concurrently, retrying slow or failed requests
+results = fetch_all({
+    'members': lambda: parliament_data.sparql_select(query),
+    'commons_memberships': parliament_data.fetch_commons_memberships,
+})
+query_result = results['members']
+commons_memberships = results['commons_memberships']
 
-commons_memberships = pdpy.fetch_commons_memberships()
-matching_memberships = pdpy_filter.filter_dates(
+# Members sitting on the same date the contact sheets look up positions for
+as_of = as_of_date()
+matching_memberships = fetch_cache.filter_dates(
     commons_memberships,
     start_col='seat_incumbency_start_date',
     end_col='seat_incumbency_end_date',
-    from_date=datetime.date(2025, 6, 1),
-    to_date=datetime.date(2025, 6, 1))
+    from_date=as_of,
+    to_date=as_of)
+metrics.rows_in = len(query_result)
 query_result = query_result[query_result['person_id'].isin(matching_memberships['person_id'])]
 
 # Make the data readable
 print("Processing data...")
-df = pdpy.readable(query_result)
+df = fetch_cache.readable(query_result)
 
 # Export to CSV
 output_file = os.path.join(output_dir, filename)
 print(f"Exporting to {output_file}...")
 
 # Convert to DataFrame if it isn't already and save to CSV
-if isinstance(df, pd.DataFrame):
-    df.to_csv(output_file, index=False)
-else:
+if not hasattr(df, 'columns'):
     # If it's not a DataFrame, convert it
+    import pandas as pd
     df = pd.DataFrame(df)
-    df.to_csv(output_file, index=False)
+write_csv(df, output_file)
+
+metrics.finish(rows_out=len(df))
 
 print(f"MPs data successfully exported to {output_file}")
 print(f"Number of records: {len(df)}") 
\ No newline at end of file
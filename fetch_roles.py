@@ -1,7 +1,9 @@
-import datetime
-import pdpy
 import os
-import pandas as pd
+import fetch_cache
+from instrumentation import start_stage
+from output_files import write_csv
+
+metrics = start_stage('fetch_roles')
 
 # Create output directory if it doesn't exist
 output_dir = "output"
@@ -11,23 +13,25 @@ os.makedirs(output_dir, exist_ok=True)
 
 # Fetch MPs data
 print("Fetching role data...")
-roles = pdpy.fetch_mps_government_roles(from_date='2024-07-05')
+# Responses are cached (or replayed offline) according to FETCH_MODE
+roles = fetch_cache.client().fetch_mps_government_roles(from_date='2024-07-05')
 
 # Make the data readable
 print("Processing data...")
-readable_roles = pdpy.readable(roles)
+readable_roles = fetch_cache.readable(roles)
 
 # Export to CSV
 output_file = os.path.join(output_dir, "roles_data.csv")
 print(f"Exporting to {output_file}...")
 
 # Convert to DataFrame if it isn't already and save to CSV
-if isinstance(readable_roles, pd.DataFrame):
-    readable_roles.to_csv(output_file, index=False)
-else:
+if not hasattr(readable_roles, 'columns'):
     # If it's not a DataFrame, convert it
-    df = pd.DataFrame(readable_roles)
-    df.to_csv(output_file, index=False)
+    import pandas as pd
+    readable_roles = pd.DataFrame(readable_roles)
+write_csv(readable_roles, output_file)
+
+metrics.finish(rows_out=len(readable_roles))
 
 print(f"MPs data successfully exported to {output_file}")
 print(f"Number of records: {len(readable_roles)}") 
\ No newline at end of file
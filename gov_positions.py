@@ -0,0 +1,183 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+import positions_snapshot
+from positions_snapshot import load_snapshot
+from roster_cache import cached
+
+DATA_DIR = 'data/government-positions'
+
+# Date the contact sheets and membership fetch ask "who holds which post" for.
+# Override with POSITIONS_AS_OF=YYYY-MM-DD.
+DEFAULT_AS_OF = datetime.date(2025, 6, 1)
+
+# Index handed over by a parent process, see preload()
+_preloaded = None
+
+SOURCE_FILES = ['person.csv', 'post.csv', 'appointment.csv', 'appointment_characteristics.csv']
+
+
+def source_paths(data_dir=DATA_DIR):
+    """Paths of the CSVs the position index is built from"""
+    return [os.path.join(data_dir, filename) for filename in SOURCE_FILES]
+
+
+def cache_sources(data_dir=DATA_DIR):
+    """Files whose contents determine the built index, for roster_cache"""
+    return source_paths(data_dir) + [__file__, positions_snapshot.__file__]
+
+
+def as_of_date():
+    """The date positions are looked up for"""
+    value = os.environ.get('POSITIONS_AS_OF')
+    if value:
+        return datetime.date.fromisoformat(value)
+    return DEFAULT_AS_OF
+
+
+def _to_days(dates, missing):
+    """Parse a date column to datetime64[D], filling missing dates with `missing`"""
+    parsed = pd.to_datetime(dates, errors='coerce').to_numpy(dtype='datetime64[D]')
+    return np.where(np.isnat(parsed), missing, parsed)
+
+
+class IntervalIndex:
+    """
+    Rows with a [start, end) date interval, sorted by start for as-of lookups.
+
+    A missing start means "since forever" and a missing end "still ongoing".
+    Dates are parsed once when the index is built.
+    """
+
+    def __init__(self, start_dates, end_dates):
+        starts = _to_days(start_dates, np.datetime64('0001-01-01', 'D'))
+        self.ends = _to_days(end_dates, np.datetime64('9999-12-31', 'D'))
+        self.order = np.argsort(starts, kind='stable')
+        self.sorted_starts = starts[self.order]
+
+    def active(self, date):
+        """Positions of the rows whose interval contains date"""
+        date = np.datetime64(date, 'D')
+        # Binary search for the rows that have started by date...
+        started = self.order[:np.searchsorted(self.sorted_starts, date, side='right')]
+        # ...and keep the ones that haven't ended yet
+        return np.sort(started[self.ends[started] > date])
+
+
+class GovernmentPositions:
+    """As-of queries over the IfG government positions dataset"""
+
+    def __init__(self, person_df, post_df, appointment_df, characteristics_df):
+        self.person_df = person_df.reset_index(drop=True)
+        self.post_df = post_df.drop_duplicates('id').set_index('id')
+        self.appointment_df = appointment_df.reset_index(drop=True)
+        self.characteristics_df = characteristics_df.reset_index(drop=True)
+
+        self.person_index = IntervalIndex(self.person_df['start_date'], self.person_df['end_date'])
+        self.appointment_index = IntervalIndex(self.appointment_df['start_date'], self.appointment_df['end_date'])
+        self.characteristics_index = IntervalIndex(
+            self.characteristics_df['start_date'], self.characteristics_df['end_date']
+        )
+        self._summaries = {}
+
+    def _people_as_of(self, date):
+        """One row per person: the name they went by on date, or their latest name"""
+        active = self.person_df.iloc[self.person_index.active(date)]
+        # People with no name row covering date keep their most recent one
+        latest = self.person_df.iloc[np.argsort(self.person_index.ends, kind='stable')[::-1]]
+        people = pd.concat([active, latest]).drop_duplicates('id', keep='first')
+        return people[['id', 'id_parliament', 'name']].rename(
+            columns={'id': 'person_id', 'name': 'name_person'}
+        )
+
+    def as_of(self, date=None):
+        """
+        Who holds which post on date, one row per appointment.
+
+        Columns: appointment_id, person_id, id_parliament, name_person,
+        post_id, name_post, rank_equivalence_value, cabinet_status,
+        start_date, end_date.
+        """
+        if date is None:
+            date = as_of_date()
+
+        appointments = self.appointment_df.iloc[self.appointment_index.active(date)]
+        appointments = appointments.rename(columns={'id': 'appointment_id'})
+
+        characteristics = self.characteristics_df.iloc[self.characteristics_index.active(date)]
+        characteristics = characteristics[['appointment_id', 'cabinet_status']].drop_duplicates(
+            'appointment_id', keep='last'
+        )
+
+        positions = appointments.merge(
+            self._people_as_of(date), on='person_id', how='left'
+        ).merge(
+            characteristics, on='appointment_id', how='left'
+        )
+        positions['name_post'] = positions['post_id'].map(self.post_df['name'])
+        positions['rank_equivalence_value'] = positions['post_id'].map(self.post_df['rank_equivalence_value'])
+
+        return positions[[
+            'appointment_id', 'person_id', 'id_parliament', 'name_person',
+            'post_id', 'name_post', 'rank_equivalence_value', 'cabinet_status',
+            'start_date', 'end_date',
+        ]]
+
+    def summary_as_of(self, date=None):
+        """
+        One row per member holding a post on date, to join 1:1 on id_parliament.
+
+        government_position lists all their posts, most senior first;
+        rank_equivalence_value and cabinet_status are those of the most
+        senior post (a lower rank_equivalence_value is more senior, the
+        Prime Minister being 1). Built once per date.
+        """
+        if date is None:
+            date = as_of_date()
+        if date not in self._summaries:
+            positions = self.as_of(date).dropna(subset=['id_parliament'])
+            positions = positions.sort_values(
+                ['rank_equivalence_value', 'start_date', 'name_post'], na_position='last', kind='stable'
+            )
+            summary = positions.groupby('id_parliament', sort=False).agg(
+                name_person=('name_person', 'first'),
+                government_position=('name_post', lambda posts: '; '.join(posts.dropna())),
+                most_senior_post=('name_post', 'first'),
+                rank_equivalence_value=('rank_equivalence_value', 'first'),
+                cabinet_status=('cabinet_status', 'first'),
+                posts=('appointment_id', 'size'),
+            ).reset_index()
+            self._summaries[date] = summary
+        return self._summaries[date]
+
+
+def load_positions(data_dir=DATA_DIR):
+    """
+    Build the position index from the typed snapshot of the CSVs.
+
+    Keys in the result are the snapshot's integer codes; use
+    positions_snapshot.decode_keys() to get the UUIDs back.
+    """
+    tables = load_snapshot(data_dir)['tables']
+    return GovernmentPositions(
+        tables['person'],
+        tables['post'],
+        tables['appointment'],
+        tables['appointment_characteristics'],
+    )
+
+
+def preload(positions):
+    """Make get_positions() return an index built elsewhere, e.g. in a parent process"""
+    global _preloaded
+    _preloaded = positions
+
+
+def get_positions(data_dir=DATA_DIR):
+    """The position index: preloaded, cached from a previous run, or built now"""
+    if _preloaded is not None:
+        return _preloaded
+    return cached('gov_positions', cache_sources(data_dir), lambda: load_positions(data_dir))
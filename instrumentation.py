@@ -0,0 +1,139 @@
+"""
+Per-stage metrics and profiling for the pipeline scripts.
+
+A script calls start_stage() when it begins and finish() on the returned
+object when it is done (or uses it as a context manager, which stops
+measuring if the stage raises first). That emits one JSON event with the rows in and
+out, wall time and any counts the stage recorded (e.g. rows dropped by
+each ranking filter):
+
+    {"event": "stage", "stage": "rank_mps", "rows_in": 650, "rows_out": 358,
+     "wall_seconds": 0.21, "peak_memory_bytes": null,
+     "counts": {"dropped.no_phone": 2, ...}, ...}
+
+Events are appended to PIPELINE_METRICS (default .cache/metrics.jsonl;
+"-" writes them to stderr). Set PIPELINE_PROFILE to a directory to also
+run each stage under cProfile and dump <stage>-<time>.prof there, and
+PIPELINE_TRACEMALLOC=on to record peak traced memory. Both are off by
+default because they slow the stage down, so wall time is only
+comparable between runs with the same settings.
+"""
+
+import cProfile
+import datetime
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+METRICS_PATH = os.environ.get('PIPELINE_METRICS', '.cache/metrics.jsonl')
+
+PROFILE_DIR = os.environ.get('PIPELINE_PROFILE')
+
+TRACE_MEMORY = os.environ.get('PIPELINE_TRACEMALLOC', 'off').lower() in ('1', 'on', 'true', 'yes')
+
+# Stages started in this process and not yet stopped
+_active = []
+
+
+def emit(event, path=None):
+    """Write a JSON event to the metrics log"""
+    path = path or METRICS_PATH
+    line = json.dumps(event, default=str)
+    if path == '-':
+        print(line, file=sys.stderr)
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(line + '\n')
+
+
+class StageMetrics:
+    """Measurements for one run of a stage, see start_stage()"""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.rows_in = None
+        self.counts = {}
+        self.started_at = datetime.datetime.now()
+
+        self._traced = TRACE_MEMORY and not tracemalloc.is_tracing()
+        if self._traced:
+            tracemalloc.start()
+        elif tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+        self._profiler = None
+        if PROFILE_DIR:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+        self._started = time.perf_counter()
+        _active.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def stop(self):
+        """Stop profiling and memory tracing, e.g. if the stage failed before finish()"""
+        if self not in _active:
+            return
+        _active.remove(self)
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._traced and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def count(self, name, value):
+        """Record a named count, e.g. rows dropped by a filter"""
+        self.counts[name] = int(value)
+
+    def finish(self, rows_out=None, **extra):
+        """Stop measuring and emit the stage's event"""
+        wall_seconds = time.perf_counter() - self._started
+        peak_memory = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+        self.stop()
+
+        profile_path = None
+        if self._profiler is not None:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            profile_path = os.path.join(
+                PROFILE_DIR, f"{self.stage}-{self.started_at.strftime('%Y%m%dT%H%M%S')}.prof"
+            )
+            self._profiler.dump_stats(profile_path)
+
+        event = {
+            'event': 'stage',
+            'stage': self.stage,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'rows_in': self.rows_in,
+            'rows_out': rows_out,
+            'wall_seconds': round(wall_seconds, 4),
+            'peak_memory_bytes': peak_memory,
+            'counts': self.counts,
+            'profile': profile_path,
+        }
+        event.update(extra)
+        emit(event)
+        return event
+
+
+def start_stage(stage):
+    """Start measuring a stage"""
+    return StageMetrics(stage)
+
+
+def stop_unfinished():
+    """
+    Stop every stage started in this process and not finished, returning
+    their names, so a stage that raised doesn't leave its profiler and
+    memory tracing running into the next one run in the same process.
+    """
+    stages = list(_active)
+    for metrics in stages:
+        metrics.stop()
+    return [metrics.stage for metrics in stages]
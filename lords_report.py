@@ -1,12 +1,31 @@
 import pandas as pd
 import os
-from difflib import SequenceMatcher
+from divisions import resolve_members
+from instrumentation import start_stage
+from output_files import write_csv
+
+metrics = start_stage('lords_report')
 
 # Load division-lords.csv into DataFrame
 df_divisions = pd.read_csv('data/division-lords.csv')
 # Load phonebanking-lords.csv into DataFrame
 df_phonebanking = pd.read_csv('data/phonebanking-lords.csv')
-# merge by name on "Member"
-merged_df = pd.merge(df_phonebanking, df_divisions, left_on='Full name', right_on='Member', how='left')
+metrics.rows_in = len(df_phonebanking)
+
+# Resolve each division "Member" to a phonebanking id_parliament: by
+# canonical name key where that identifies one peer, otherwise by a close
+# fuzzy match between keys (see divisions.resolve_members)
+member_ids = resolve_members(
+    df_divisions['Member'].tolist(), df_phonebanking['Full name'].tolist(), df_phonebanking['id_parliament'].tolist()
+)
+metrics.count('matched', sum(member_id is not None for member_id in member_ids))
+
+df_divisions['id_parliament'] = pd.array(member_ids, dtype='Int64')
+df_divisions = df_divisions.dropna(subset=['id_parliament']).drop_duplicates('id_parliament')
+print(f"Matched {len(df_divisions)} division members to the phonebanking list")
+
+# merge by id_parliament
+merged_df = pd.merge(df_phonebanking, df_divisions, on='id_parliament', how='left')
 # save to csv
-merged_df.to_csv('output/lords_merged_report.csv', index=False)
\ No newline at end of file
+write_csv(merged_df, 'output/lords_merged_report.csv')
+metrics.finish(rows_out=len(merged_df))
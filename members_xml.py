@@ -0,0 +1,137 @@
+import sys
+import xml.etree.ElementTree as ET
+from array import array
+
+import pandas as pd
+
+# Titles dropped when splitting a display name into first and last name
+NAME_TITLES = ['mr', 'mrs', 'ms', 'dr', 'sir', 'dame', 'lord', 'lady', 'hon', 'rt']
+
+# Address types we keep phone numbers and email addresses for
+ADDRESS_FIELDS = {
+    'Parliamentary office': ('parliamentary_phone', 'parliamentary_email_address'),
+    'Constituency office': ('constituency_phone', 'constituency_email_address'),
+}
+
+
+# Columns of a Roster, in contact record order
+ROSTER_FIELDS = [
+    'full_name', 'first_name', 'last_name', 'Party', 'house',
+    'parliamentary_phone', 'constituency_phone', 'phone_number_1',
+    'parliamentary_email_address', 'constituency_email_address',
+]
+
+# Columns with few distinct values, held as categoricals
+CATEGORY_FIELDS = ['Party', 'house']
+
+
+def split_name(full_name):
+    """Split a display name into first and last name, ignoring titles"""
+    name_parts = full_name.split()
+    if len(name_parts) < 2:
+        return full_name, ''
+
+    filtered_parts = [part for part in name_parts if not part.lower() in NAME_TITLES]
+    if len(filtered_parts) >= 2:
+        return filtered_parts[0], ' '.join(filtered_parts[1:])
+    return name_parts[0], ' '.join(name_parts[1:])
+
+
+def _text(elem):
+    """Stripped text of an element, or '' if it is missing or empty"""
+    if elem is None or not elem.text:
+        return ''
+    return elem.text.strip()
+
+
+def _member_record(member):
+    """Project a <Member> element onto the fields the contact sheet needs"""
+    record = {}
+    record['id_parliament'] = int(member.get('Member_Id', ''))
+    record['full_name'] = _text(member.find('DisplayAs'))
+    record['first_name'], record['last_name'] = split_name(record['full_name'])
+
+    # Repeated values (parties, shared office numbers) are stored once
+    record['Party'] = sys.intern(_text(member.find('Party')))
+    record['house'] = sys.intern(_text(member.find('House')))
+
+    record['parliamentary_phone'] = ''
+    record['constituency_phone'] = ''
+
+    addresses = member.find('Addresses')
+    if addresses is not None:
+        for address in addresses.findall('Address'):
+            fields = ADDRESS_FIELDS.get(_text(address.find('Type')))
+            if fields is None:
+                continue
+            phone_field, email_field = fields
+            # Email addresses are only taken from addresses that list a phone
+            if address.findtext('Phone'):
+                phone_number = _text(address.find('Phone'))
+                if phone_number:
+                    record[phone_field] = sys.intern(phone_number)
+                email_address = _text(address.find('Email'))
+                if email_address:
+                    record[email_field] = email_address
+
+    record['phone_number_1'] = record['parliamentary_phone'] or record['constituency_phone']
+    return record
+
+
+def iter_members(path):
+    """
+    Stream contact records from a Members XML export.
+
+    Uses incremental parsing and clears each <Member> once it has been
+    projected, so memory stays flat regardless of the size of the export.
+    """
+    context = ET.iterparse(path, events=('start', 'end'))
+    root = None
+    for event, elem in context:
+        if root is None:
+            root = elem
+        if event != 'end' or elem.tag != 'Member':
+            continue
+        yield _member_record(elem)
+        elem.clear()
+        # Drop the finished member from the root so the tree never grows
+        root.clear()
+
+
+class Roster:
+    """
+    Contact records held as columns rather than a dict per member.
+
+    Ids are a packed integer array and the text columns lists of (interned)
+    strings, so a roster costs little more than its distinct values and
+    several can be kept in one process. to_frame() gives the typed frame the
+    contact builders work on.
+    """
+
+    __slots__ = ('ids', 'columns')
+
+    def __init__(self, records=()):
+        self.ids = array('q')
+        self.columns = {field: [] for field in ROSTER_FIELDS}
+        for record in records:
+            self.append(record)
+
+    def append(self, record):
+        self.ids.append(record['id_parliament'])
+        for field, column in self.columns.items():
+            column.append(record.get(field))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def to_frame(self):
+        """The roster as a DataFrame, with categorical party and house"""
+        df = pd.DataFrame({'id_parliament': pd.Series(self.ids, dtype='int64'), **self.columns})
+        for field in CATEGORY_FIELDS:
+            df[field] = df[field].astype('category')
+        return df
+
+
+def load_members(path):
+    """Load every contact record from a Members XML export"""
+    return Roster(iter_members(path))
@@ -0,0 +1,154 @@
+"""
+Canonical keys for MP and peer names, and an exact-match index over them.
+
+The same member appears as "Lord Anderson of Ipswich", "Lord David Anderson
+of Ipswich", "David Anderson, Baron Anderson of Ipswich" and so on. Each
+name is reduced to keys with honorifics and given names dropped:
+
+    Lord David Anderson of Ipswich  ->  ('anderson of ipswich', 'anderson')
+    The Earl of Courtown            ->  ('earl of courtown',)
+    Ms Diane Abbott                 ->  ('diane abbott', 'abbott')
+
+most specific first. Names are indexed under their first key, and peers
+with a territorial designation also under their bare surname. A name with
+a designation is only looked up exactly, one without falls back to the
+surname. A surname that could mean more than one member resolves to
+nobody, and a plain "Firstname Surname" only resolves to a member known by
+that given name ("David Smith" isn't Lord Smith of Hindhead), so a lookup
+only succeeds when it identifies a single member.
+"""
+
+import re
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+ParsedName = namedtuple('ParsedName', ['keys', 'is_peer', 'place', 'given'])
+
+PEER_TITLES = {
+    'lord', 'baron', 'baroness', 'lady', 'viscount', 'viscountess',
+    'earl', 'countess', 'marquess', 'marchioness', 'duke', 'duchess',
+}
+
+HONORIFICS = {
+    'the', 'rt', 'right', 'hon', 'honourable', 'mr', 'mrs', 'ms', 'miss', 'mx', 'dr',
+    'sir', 'dame', 'prof', 'professor', 'rev', 'revd',
+}
+
+POST_NOMINALS = {
+    'kc', 'qc', 'mp', 'pc', 'dl', 'jp', 'obe', 'mbe', 'cbe', 'kbe', 'dbe', 'gbe', 'cb', 'kcb', 'gcb',
+    'cmg', 'kcmg', 'gcmg', 'lvo', 'cvo', 'kcvo', 'gcvo', 'dsc', 'dso', 'mc', 'frs', 'frse', 'freng',
+    'fba', 'fmedsci',
+}
+
+
+def _clean(name):
+    """Lower case ASCII words, with any parenthesised note removed"""
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    text = re.sub(r'\(.*?\)', ' ', text)
+    text = text.replace("'", '').replace('’', '')
+    # Keep hyphens inside words so double-barrelled names stay together
+    return re.sub(r'[^a-z0-9,\-]+', ' ', text).strip()
+
+
+@lru_cache(maxsize=None)
+def parse_name(name):
+    """
+    Keys of a name, most specific first, whether it is a peer's, its
+    territorial designation ('' if none) and its given names.
+
+    Memoized, as the same names are looked up across every list and stage.
+    """
+    text = _clean(name)
+
+    # "Donald Anderson, Baron Anderson of Swansea": the title after the comma
+    # is what the other sources use
+    if ',' in text:
+        head, tail = text.split(',', 1)
+        text = tail if PEER_TITLES & set(tail.split()) else head
+    tokens = [token.strip('-') for token in text.replace(',', ' ').split()]
+    tokens = [token for token in tokens if token and token not in POST_NOMINALS]
+
+    place = []
+    if 'of' in tokens[1:]:
+        split_at = tokens.index('of', 1)
+        tokens, place = tokens[:split_at], tokens[split_at + 1:]
+
+    titles = [token for token in tokens if token in PEER_TITLES]
+    names = [token.replace('-', ' ') for token in tokens if token not in PEER_TITLES and token not in HONORIFICS]
+    place = ' '.join(place).replace('-', ' ')
+
+    if titles:
+        if not names:
+            # "The Earl of Courtown" has no name other than the title
+            # and the place is part of the title rather than a designation
+            return ParsedName(((f"{titles[-1]} of {place}" if place else titles[-1]),), True, '', ())
+        surname = names[-1]
+        keys = (f"{surname} of {place}", surname) if place else (surname,)
+        return ParsedName(keys, True, place, tuple(names[:-1]))
+
+    if not names:
+        return ParsedName((), False, '', ())
+    full = ' '.join(names)
+    if place:
+        full = f"{full} of {place}"
+    return ParsedName(tuple(dict.fromkeys((full, names[-1]))), False, place, tuple(names[:-1]))
+
+
+def name_key(name):
+    """The canonical key of a name, or '' if it has none"""
+    keys = parse_name(name).keys
+    return keys[0] if keys else ''
+
+
+class NameIndex:
+    """
+    Hash index from name key to id over a roster.
+
+    lookup() resolves a name in O(1) when one of its keys identifies a
+    single roster member, and returns None otherwise, leaving the name for
+    fuzzy matching.
+    """
+
+    def __init__(self, names, ids=None):
+        ids = names if ids is None else ids
+        # Members under each key: most specific keys, and the bare surnames
+        # of peers with a designation
+        self._ids = {}
+        self._surnames = {}
+        # Given names each member is known by on the roster
+        self._given = {}
+        for name, member_id in zip(names, ids):
+            parsed = parse_name(name)
+            if not parsed.keys:
+                continue
+            self._ids.setdefault(parsed.keys[0], set()).add(member_id)
+            if parsed.is_peer and parsed.place:
+                self._surnames.setdefault(parsed.keys[1], set()).add(member_id)
+            if parsed.given:
+                self._given.setdefault(member_id, set()).add(parsed.given[0])
+
+    def __len__(self):
+        return sum(len(members) == 1 for members in self._ids.values())
+
+    def lookup(self, name):
+        """The id of the roster member a name refers to, or None"""
+        parsed = parse_name(name)
+        if not parsed.keys:
+            return None
+        # A full name or peer's title matching exactly ("Lord Goldsmith", not
+        # Lord Goldsmith of Richmond Park)
+        exact = self._ids.get(parsed.keys[0], set())
+        if len(exact) == 1 and (parsed.is_peer or parsed.given or parsed.place):
+            return next(iter(exact))
+        if len(exact) > 1 or parsed.place:
+            return None
+
+        members = self._ids.get(parsed.keys[-1], set()) | self._surnames.get(parsed.keys[-1], set())
+        if len(members) != 1:
+            return None
+        member_id = next(iter(members))
+        if not parsed.is_peer and parsed.given and parsed.given[0] not in self._given.get(member_id, ()):
+            return None
+        return member_id
@@ -0,0 +1,211 @@
+"""
+Resolve the names in list files (data/exclude_*.txt, data/gotv_lords.txt)
+to roster members, remembering the results between runs.
+
+Each line is resolved to an id_parliament by canonical name key, or failing
+that by fuzzy match (see name_keys and name_matcher). The resolutions are
+saved in .cache/name-lists/<list>.json along with a fingerprint of the
+roster they were made against, so a later run against the same roster
+only has to match lines that are new or changed.
+
+Operators can pin a line in an optional <list>.pins.json next to the list,
+mapping the line as written to the id_parliament it means, or to null if
+it shouldn't match anyone:
+
+    {"Baroness Helena Kennedy": 3950, "Lord Harrison": null}
+
+    python name_lists.py data/exclude_lords.txt    # show how each line resolved
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves still merge, just without the lock
+    fcntl = None
+
+from name_keys import NameIndex
+from name_matcher import NameMatcher
+
+CACHE_DIR = os.environ.get('NAME_LIST_CACHE_DIR', '.cache/name-lists')
+
+# Rosters remembered per list, e.g. the Commons and Lords sheets for the
+# Lords exclusions
+MAX_ROSTERS = 4
+
+# Matching code, so resolutions are redone when it changes
+CODE = [os.path.join(os.path.dirname(os.path.abspath(__file__)), name) for name in ('name_keys.py', 'name_matcher.py')]
+
+
+def read_name_list(path):
+    """Read a list of names, skipping blank lines and comments"""
+    names = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                names.append(line)
+    return names
+
+
+def pins_path(path):
+    return os.path.splitext(path)[0] + '.pins.json'
+
+
+def cache_path(path):
+    return os.path.join(CACHE_DIR, os.path.splitext(os.path.basename(path))[0] + '.json')
+
+
+def load_pins(path):
+    """Operator pins for a list: line -> id_parliament or None"""
+    pins_file = pins_path(path)
+    if not os.path.exists(pins_file):
+        return {}
+    with open(pins_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def roster_fingerprint(names, ids, threshold):
+    """Identifies the roster, threshold and matching code resolutions were made with"""
+    digest = hashlib.sha256(repr(threshold).encode())
+    for code_path in CODE:
+        with open(code_path, 'rb') as f:
+            digest.update(f.read())
+    for name, member_id in zip(names, ids):
+        digest.update(f"{name}\t{member_id}\n".encode())
+    return digest.hexdigest()
+
+
+def _load_cache(path):
+    try:
+        with open(cache_path(path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'rosters': {}}
+
+
+@contextmanager
+def _locked(path):
+    """Hold a list's cache lock, e.g. while ranking stages run in parallel"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(cache_path(path) + '.lock', 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _save_resolutions(path, fingerprint, lines):
+    """
+    Save a roster's resolutions into a list's cache.
+
+    The cache is re-read under the lock, so the resolutions other stages
+    saved for other rosters in the meantime are kept.
+    """
+    with _locked(path):
+        cache = _load_cache(path)
+        cache['rosters'].pop(fingerprint, None)
+        cache['rosters'][fingerprint] = {'lines': lines}
+        # Keep the most recently used rosters
+        for stale in list(cache['rosters'])[:-MAX_ROSTERS]:
+            del cache['rosters'][stale]
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=CACHE_DIR, suffix='.tmp', delete=False,
+                                         prefix=os.path.basename(cache_path(path)) + '.') as f:
+            json.dump(cache, f, indent=2, ensure_ascii=False)
+        os.replace(f.name, cache_path(path))
+
+
+def _plain(member_id):
+    """An id as a JSON-friendly value"""
+    return member_id.item() if hasattr(member_id, 'item') else member_id
+
+
+class RosterIndex:
+    """Key and fuzzy indexes over a roster, built once per process"""
+
+    def __init__(self, names, ids):
+        self.names = list(names)
+        self.name_index = NameIndex(self.names, ids)
+        # First occurrence wins, as in NameMatcher
+        self.ids_by_name = dict(zip(reversed(self.names), reversed(ids)))
+        self._name_matcher = None
+
+    @property
+    def name_matcher(self):
+        # Only built if some line doesn't resolve by key
+        if self._name_matcher is None:
+            self._name_matcher = NameMatcher(self.names)
+        return self._name_matcher
+
+
+@lru_cache(maxsize=8)
+def roster_index(names, ids):
+    """Shared RosterIndex for a roster, given as tuples"""
+    return RosterIndex(names, ids)
+
+
+def resolve_names(path, names, roster_names, roster_ids, threshold=0.8):
+    """
+    Resolve the lines of a list to roster ids.
+
+    Returns {line: {'id_parliament': id or None, 'score': float, 'method':
+    'key' | 'fuzzy' | 'none' | 'pinned'}}. Only lines not already resolved
+    against this roster are matched; pins always win.
+    """
+    roster_names = list(roster_names)
+    roster_ids = [_plain(member_id) for member_id in roster_ids]
+    fingerprint = roster_fingerprint(roster_names, roster_ids, threshold)
+
+    cache = _load_cache(path)
+    known = cache['rosters'].get(fingerprint, {}).get('lines', {})
+    resolved = {line: known[line] for line in names if line in known}
+    pending = [line for line in names if line not in resolved]
+
+    if pending:
+        # Campaigns ranking the same roster in one process share its indexes
+        index = roster_index(tuple(roster_names), tuple(roster_ids))
+        for line in pending:
+            member_id = index.name_index.lookup(line)
+            if member_id is not None:
+                resolved[line] = {'id_parliament': member_id, 'score': 1.0, 'method': 'key'}
+                continue
+            match, score = index.name_matcher.match(line, threshold=threshold)
+            if match:
+                resolved[line] = {
+                    'id_parliament': index.ids_by_name[match], 'score': round(score, 4), 'method': 'fuzzy',
+                }
+            else:
+                resolved[line] = {'id_parliament': None, 'score': 0.0, 'method': 'none'}
+
+        _save_resolutions(path, fingerprint, {line: resolved[line] for line in names})
+
+    for line, member_id in load_pins(path).items():
+        if line in resolved:
+            resolved[line] = {'id_parliament': member_id, 'score': 1.0, 'method': 'pinned'}
+
+    return {line: resolved[line] for line in names}
+
+
+def main(paths):
+    for path in paths:
+        cache = _load_cache(path)
+        if not cache['rosters']:
+            print(f"{path}: not resolved yet, run a ranking that uses it")
+            continue
+        pins = load_pins(path)
+        for fingerprint, roster in cache['rosters'].items():
+            print(f"\n{path} (roster {fingerprint[:12]}):")
+            for line, resolution in roster['lines'].items():
+                if line in pins:
+                    resolution = {'id_parliament': pins[line], 'score': 1.0, 'method': 'pinned'}
+                print(f"  {line:<50} -> {str(resolution['id_parliament']):<8} "
+                      f"{resolution['method']:<7} {resolution['score']:.2f}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
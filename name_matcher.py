@@ -0,0 +1,87 @@
+from difflib import SequenceMatcher
+
+import numpy as np
+
+
+def similarity(a, b):
+    """Calculate similarity between two strings"""
+    return SequenceMatcher(None, a.lower().strip(), b.lower().strip()).ratio()
+
+
+class NameMatcher:
+    """
+    Fuzzy name lookup over a fixed roster.
+
+    Returns exactly what scanning the roster with similarity() would, but
+    builds a character-count index once and uses it to bound every name's
+    score in a single vectorized step. SequenceMatcher only runs on the few
+    names whose bound can still beat the best match found so far.
+    """
+
+    def __init__(self, names):
+        self.names = []
+        self._normalized = []
+
+        seen = set()
+        for name in names:
+            # Keep the first occurrence so ties resolve in roster order
+            if name in seen:
+                continue
+            seen.add(name)
+            self.names.append(name)
+            self._normalized.append(name.lower().strip())
+
+        alphabet = sorted(set(''.join(self._normalized)))
+        self._alphabet = {char: column for column, char in enumerate(alphabet)}
+        self._counts = np.zeros((len(self.names), len(alphabet)), dtype=np.uint8)
+        for row, normalized in enumerate(self._normalized):
+            for char in normalized:
+                column = self._alphabet[char]
+                self._counts[row, column] = min(int(self._counts[row, column]) + 1, 255)
+        self._lengths = np.array([len(n) for n in self._normalized], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.names)
+
+    def upper_bounds(self, target_name):
+        """Best possible similarity of target_name to every roster name"""
+        normalized = target_name.lower().strip()
+        query = np.zeros(len(self._alphabet), dtype=np.uint8)
+        for char in normalized:
+            column = self._alphabet.get(char)
+            if column is not None:
+                query[column] = min(int(query[column]) + 1, 255)
+
+        # Same bound as SequenceMatcher.quick_ratio(), for the whole roster at once
+        overlap = np.minimum(self._counts, query).sum(axis=1)
+        total = self._lengths + len(normalized)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(total > 0, 2.0 * overlap / total, 1.0)
+
+    def match(self, target_name, threshold=0.8):
+        """Find the best fuzzy match for a name, returning (match, score)"""
+        best_match = None
+        best_position = None
+        best_score = 0
+
+        bounds = self.upper_bounds(target_name)
+        candidates = np.flatnonzero(bounds >= threshold)
+        # Most promising first, roster order within equal bounds
+        candidates = candidates[np.lexsort((candidates, -bounds[candidates]))]
+
+        matcher = SequenceMatcher()
+        matcher.set_seq1(target_name.lower().strip())
+        for position in candidates:
+            if bounds[position] < best_score:
+                break
+            matcher.set_seq2(self._normalized[position])
+            score = matcher.ratio()
+            if score < threshold:
+                continue
+            # An equal score only wins if it comes earlier in the roster
+            if score > best_score or (best_match is not None and score == best_score and position < best_position):
+                best_score = score
+                best_position = position
+                best_match = self.names[position]
+
+        return best_match, best_score
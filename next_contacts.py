@@ -0,0 +1,162 @@
+"""
+Who to call next: a priority heap over a ranked contact sheet.
+
+ContactQueue loads a ranked sheet once and serves it a page at a time, so
+a dialing front end can pull the next few contacts without re-reading or
+re-sorting the list:
+
+    queue = ContactQueue.from_sheet('output/ranked_contact_lords_gotv.csv')
+    page = queue.take(10)            # the next 10, handed out
+    queue.remove(page[0]['id_parliament'])       # called, done with
+    queue.release(page[1]['id_parliament'])      # not called, back in line
+    queue.reprioritise(page[2]['id_parliament'], 50.5)   # try again later
+
+Priorities are the sheet order (row 0 first) unless a column is given, and
+lower comes first. take() and peek() cost O(N log M) for N contacts out of
+M, remove() and reprioritise() O(log M) amortized: changed or removed
+entries are left in the heap and skipped when they surface.
+
+Members already spoken to, only reachable by email or held back after a
+voicemail in the outcome store (see call_outcomes) are left out when
+loading.
+
+    python next_contacts.py output/ranked_contact_lords_gotv.csv -n 10
+"""
+
+import argparse
+import heapq
+import itertools
+from datetime import datetime
+
+from call_outcomes import load_store, queue_status
+from contact_sheets import read_contacts
+
+
+class ContactQueue:
+    """Contacts in a priority heap, keyed by id_parliament"""
+
+    def __init__(self, contacts, priorities=None):
+        """contacts: row dicts with an id_parliament, in priority order unless priorities are given"""
+        contacts = list(contacts)
+        ids = [row['id_parliament'] for row in contacts]
+        if priorities is None:
+            priorities = range(len(contacts))
+        heap = [[priority, order, member_id] for order, (priority, member_id) in enumerate(zip(priorities, ids))]
+        self._rows = dict(zip(ids, contacts))
+        self._entries = dict(zip(ids, heap))
+        self._handed_out = {}
+        # Breaks ties between equal priorities in insertion order
+        self._order = itertools.count(len(heap))
+        heapq.heapify(heap)
+        self._heap = heap
+
+    @classmethod
+    def from_sheet(cls, path, priority_column=None, descending=False, store=None, now=None):
+        """
+        Queue of a ranked sheet, without the members the outcome store says
+        not to call now.
+
+        Priorities come from priority_column (highest first if descending,
+        e.g. a 'Score'), or the sheet order.
+        """
+        df = read_contacts(path)
+        store = load_store() if store is None else store
+        status = queue_status(df['id_parliament'], store, now or datetime.now())
+        df = df[status.isin(['queued', 'requeued']).to_numpy()]
+
+        priorities = None
+        if priority_column:
+            values = df[priority_column].astype(float)
+            priorities = (-values if descending else values).tolist()
+        return cls(df.to_dict('records'), priorities)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, member_id):
+        return member_id in self._entries
+
+    def _pop(self):
+        """The next live entry, or None once the heap is empty"""
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if entry[2] is not None:
+                return entry
+        return None
+
+    def _compact(self):
+        # Rebuild once skipped entries outnumber live ones, so the heap
+        # stays O(M)
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [entry for entry in self._heap if entry[2] is not None]
+            heapq.heapify(self._heap)
+
+    def take(self, n):
+        """Hand out the next n contacts, removing them from the queue until released"""
+        page = []
+        while len(page) < n:
+            entry = self._pop()
+            if entry is None:
+                break
+            member_id = entry[2]
+            del self._entries[member_id]
+            self._handed_out[member_id] = entry[0]
+            page.append(self._rows[member_id])
+        return page
+
+    def peek(self, n):
+        """The next n contacts, left in the queue"""
+        entries = []
+        while len(entries) < n:
+            entry = self._pop()
+            if entry is None:
+                break
+            entries.append(entry)
+        for entry in entries:
+            heapq.heappush(self._heap, entry)
+        return [self._rows[entry[2]] for entry in entries]
+
+    def remove(self, member_id):
+        """Take a contact out for good, e.g. once called"""
+        entry = self._entries.pop(member_id, None)
+        if entry is not None:
+            # Left in the heap and skipped when it surfaces
+            entry[2] = None
+            self._compact()
+        self._handed_out.pop(member_id, None)
+        self._rows.pop(member_id, None)
+
+    def reprioritise(self, member_id, priority):
+        """Give a queued or handed out contact a new priority, returning it to the queue"""
+        if member_id not in self._rows:
+            raise KeyError(member_id)
+        entry = self._entries.pop(member_id, None)
+        if entry is not None:
+            entry[2] = None
+        self._handed_out.pop(member_id, None)
+        entry = [priority, next(self._order), member_id]
+        self._entries[member_id] = entry
+        heapq.heappush(self._heap, entry)
+        self._compact()
+
+    def release(self, member_id):
+        """Return a handed out contact to the queue at its previous priority"""
+        self.reprioritise(member_id, self._handed_out[member_id])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the next contacts to call from a ranked sheet")
+    parser.add_argument('sheet', help="ranked contact sheet, e.g. output/ranked_contact_lords_gotv.csv")
+    parser.add_argument('-n', type=int, default=10, help="contacts to show")
+    parser.add_argument('--priority-column', help="column to order by instead of the sheet order")
+    parser.add_argument('--descending', action='store_true', help="highest priority_column values first")
+    args = parser.parse_args()
+
+    queue = ContactQueue.from_sheet(args.sheet, args.priority_column, args.descending)
+    print(f"📞 {len(queue)} contacts to call in {args.sheet}; next {args.n}:")
+    for row in queue.peek(args.n):
+        print(f"  {row['Full name']:<40} {row['Party']:<20} {row['Phone']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+"""
+Crash-safe writing of the output sheets, with a manifest for each.
+
+Sheets are written in chunks to a temporary file next to the target, which
+is fsynced and renamed over the target only once complete, so a failed or
+interrupted run leaves the previous sheet in place rather than a truncated
+one. Paths ending in .gz or .zst are compressed (.zst needs the zstandard
+package).
+
+Each sheet gets a <sheet>.manifest.json beside it with its row count,
+columns, size, the SHA-256 of the file's bytes (sha256, as pipeline.py
+fingerprints files) and of its uncompressed content (content_sha256).
+check_output() compares the file's size against it without reading the
+sheet, and the readers compare the rows they load, so a later stage
+refuses a sheet that doesn't match what was written.
+"""
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+# Rows converted to CSV at a time
+CHUNK_ROWS = 10000
+
+# Temporary files are created private; sheets get the usual permissions
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class IncompleteOutput(ValueError):
+    """A sheet doesn't match the manifest it was written with"""
+
+
+def compression_of(path):
+    """Compression implied by a path's extension, or None"""
+    if path.endswith('.gz'):
+        return 'gzip'
+    if path.endswith('.zst'):
+        return 'zstd'
+    return None
+
+
+def manifest_path(path):
+    return path + '.manifest.json'
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("Writing or reading .zst sheets needs the zstandard package") from e
+    return zstandard
+
+
+def open_text(path):
+    """Open a sheet, compressed or not, for reading as text"""
+    compression = compression_of(path)
+    if compression == 'gzip':
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    if compression == 'zstd':
+        reader = _zstandard().ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def _fsync_directory(directory):
+    try:
+        fd = os.open(directory or '.', os.O_RDONLY)
+    except OSError:
+        # Not possible on every platform (e.g. Windows)
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _temporary(path, mode, encoding=None):
+    """An open temporary file next to path, to be renamed over it"""
+    f = tempfile.NamedTemporaryFile(mode, encoding=encoding, dir=os.path.dirname(path) or '.',
+                                    prefix=os.path.basename(path) + '.', suffix='.tmp', delete=False)
+    os.chmod(f.name, 0o666 & ~_UMASK)
+    return f
+
+
+def _replace(tmp_path, path):
+    os.replace(tmp_path, path)
+    _fsync_directory(os.path.dirname(path))
+
+
+class _HashingFile:
+    """Passes writes through to a file, hashing the bytes written"""
+
+    def __init__(self, f):
+        self._f = f
+        self.digest = hashlib.sha256()
+
+    def write(self, data):
+        self.digest.update(data)
+        return self._f.write(data)
+
+    def flush(self):
+        self._f.flush()
+
+
+class OutputWriter:
+    """
+    Streams a sheet to a temporary file and commits it atomically.
+
+    Used as a context manager: the sheet replaces the target when the block
+    finishes, and is discarded if it raises.
+
+        with OutputWriter('output/sheet.csv') as out:
+            out.write_frame(df)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.compression = compression_of(path)
+        self.rows = 0
+        self.columns = None
+        self.chunks = 0
+        self._digest = hashlib.sha256()
+        self._csv = csv.writer(self, lineterminator=os.linesep)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._raw = _temporary(path, 'wb')
+        self._tmp_path = self._raw.name
+        if self.compression is None:
+            # The content is the file's bytes
+            self._stream = self._raw
+            self._file_digest = self._digest
+        else:
+            compressed = _HashingFile(self._raw)
+            self._file_digest = compressed.digest
+            if self.compression == 'gzip':
+                # A fixed timestamp, so the same rows give the same bytes
+                self._stream = gzip.GzipFile(filename='', fileobj=compressed, mode='wb', mtime=0)
+            else:
+                self._stream = _zstandard().ZstdCompressor().stream_writer(compressed, closefd=False)
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        self._digest.update(data)
+        self._stream.write(data)
+
+    def write_header(self, columns):
+        self.columns = list(columns)
+        self._csv.writerow(self.columns)
+
+    def write_row(self, row):
+        self._csv.writerow(row)
+        self.rows += 1
+
+    def write_frame(self, df, chunk_rows=CHUNK_ROWS):
+        """Write a DataFrame, header included, chunk_rows rows at a time"""
+        self.columns = [str(column) for column in df.columns]
+        for start in range(0, max(len(df), 1), chunk_rows):
+            self.write(df.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0))
+            self.chunks += 1
+        self.rows += len(df)
+
+    def commit(self):
+        """Move the finished sheet into place and write its manifest"""
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+        _replace(self._tmp_path, self.path)
+
+        stat = os.stat(self.path)
+        manifest = {
+            'file': os.path.basename(self.path),
+            'rows': self.rows,
+            'columns': self.columns,
+            'bytes': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': self._file_digest.hexdigest(),
+            'content_sha256': self._digest.hexdigest(),
+            'compression': self.compression,
+        }
+        with _temporary(manifest_path(self.path), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        _replace(f.name, manifest_path(self.path))
+        return manifest
+
+    def abort(self):
+        """Discard the partly written sheet, leaving any previous one"""
+        try:
+            if self._stream is not self._raw:
+                self._stream.close()
+        finally:
+            self._raw.close()
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.manifest = self.commit()
+        else:
+            self.abort()
+        return False
+
+
+def write_csv(df, path, chunk_rows=CHUNK_ROWS):
+    """Write a DataFrame as a sheet atomically, returning its manifest"""
+    with OutputWriter(path) as out:
+        out.write_frame(df, chunk_rows)
+    return out.manifest
+
+
+def read_manifest(path):
+    """The manifest a sheet was written with, or None if it has none"""
+    try:
+        with open(manifest_path(path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def check_output(path, full=False):
+    """
+    Check a sheet against its manifest, returning the manifest (or None for
+    sheets written without one).
+
+    Only the file's size is compared unless full is set, when the content
+    is re-read and its checksum compared too. Raises IncompleteOutput on a
+    mismatch.
+    """
+    manifest = read_manifest(path)
+    if manifest is None:
+        return None
+    size = os.path.getsize(path)
+    if size != manifest['bytes']:
+        raise IncompleteOutput(
+            f"{path} is {size} bytes but was written as {manifest['bytes']}; re-run the stage that writes it"
+        )
+    if full:
+        digest = hashlib.sha256()
+        with open_text(path) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), ''):
+                digest.update(chunk.encode('utf-8'))
+        # Manifests written before content_sha256 hashed the content as sha256
+        if digest.hexdigest() != manifest.get('content_sha256', manifest['sha256']):
+            raise IncompleteOutput(f"{path} doesn't match the checksum it was written with")
+    return manifest
+
+
+def check_rows(path, manifest, rows):
+    """Compare the rows read from a sheet with its manifest"""
+    if manifest is not None and rows != manifest['rows']:
+        raise IncompleteOutput(f"{path} has {rows} rows but was written with {manifest['rows']}")
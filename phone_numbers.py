@@ -0,0 +1,111 @@
+"""
+Canonical phone numbers, and the members behind each number.
+
+The exports write the same number several ways ("0207 219 3000", "020 7219
+3000", "2072193775", "004420 7219 5353"). normalize_phones() rewrites UK
+numbers as whole-column operations to the usual spacing for their area
+code:
+
+    020 7219 4426    0161 624 4248    01234 567890    07700 900123
+
+Fields holding several numbers or notes ("020 7219 1234; Fax: ...") are
+kept as written, and fields with no digits at all are blanked.
+
+Many Lords share a switchboard (020 7219 5353), so PhoneIndex maps each
+number to the members it reaches, and call_slots() lets a ranking batch
+everyone behind a shared number into one call.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Area code patterns and the groups their numbers are written in
+PHONE_FORMATS = [
+    (r'02', (3, 4, 4)),                    # London, Cardiff, Belfast...
+    (r'01\d1|011|0[389]', (4, 3, 4)),      # Leeds, Leicester..., non-geographic
+    (r'0[17]', (5, 6)),                    # other geographic codes, mobiles
+]
+
+
+def _group(digits, sizes):
+    pattern = '^' + ''.join(rf'(\d{{{size}}})' for size in sizes) + '$'
+    return digits.str.replace(pattern, ' '.join(rf'\{i + 1}' for i in range(len(sizes))), regex=True)
+
+
+def normalize_phones(numbers):
+    """A column of phone numbers in canonical form, '' where there is none"""
+    text = numbers.fillna('').astype(str).str.strip()
+    digits = text.str.replace(r'[\s().\-]', '', regex=True)
+
+    # International and bare national forms to the 11 digit national number
+    digits = digits.str.replace(r'^(?:\+|00)?44(?:0)?(?=[1-9]\d{9}$)', '0', regex=True)
+    digits = digits.str.replace(r'^(?=[1-9]\d{9}$)', '0', regex=True)
+    national = digits.str.fullmatch(r'0\d{10}')
+
+    conditions = [national & digits.str.match(prefix) for prefix, _ in PHONE_FORMATS]
+    choices = [_group(digits, sizes) for _, sizes in PHONE_FORMATS]
+    written = text.str.replace(r'\s+', ' ', regex=True)
+    written = written.where(written.str.contains(r'\d'), '')
+    return pd.Series(np.select(conditions, choices, default=written), index=numbers.index, dtype=object)
+
+
+def shared_line_mask(numbers, min_members=2):
+    """Rows whose number is shared by at least min_members rows"""
+    numbers = normalize_phones(numbers)
+    counts = numbers.groupby(numbers).transform('size')
+    return (numbers != '') & (counts >= min_members)
+
+
+class PhoneIndex:
+    """
+    Members reached on each (canonical) phone number.
+
+    Built with one groupby over the column, so a sheet of any size is
+    indexed in a single pass.
+    """
+
+    def __init__(self, numbers, ids):
+        numbers = normalize_phones(pd.Series(list(numbers)))
+        ids = pd.Series(list(ids), index=numbers.index)
+        has_number = numbers != ''
+        self._members = {
+            number: group.tolist()
+            for number, group in ids[has_number].groupby(numbers[has_number], sort=False)
+        }
+
+    def __len__(self):
+        return len(self._members)
+
+    def members(self, number):
+        """Ids of the members on a number"""
+        return self._members.get(normalize_phones(pd.Series([number])).iloc[0], [])
+
+    def shared(self, min_members=2):
+        """Numbers reaching at least min_members members, most members first"""
+        shared = {number: ids for number, ids in self._members.items() if len(ids) >= min_members}
+        return dict(sorted(shared.items(), key=lambda item: -len(item[1])))
+
+
+def call_slots(df, column='Phone', min_members=2, within=('priority_rank',)):
+    """
+    Batch the rows of a sorted sheet behind shared numbers into call slots.
+
+    Rows on a number shared by at least min_members rows, and with the same
+    values in the within columns (e.g. the priority tier), become one slot,
+    placed where the first of them was; every other row is a slot of its
+    own. Returns the reordered frame with 'Call slot' (from 1) and 'Direct
+    line' (a number of the member's own) columns added.
+    """
+    numbers = normalize_phones(df[column])
+    shared = shared_line_mask(numbers, min_members).to_numpy()
+    positions = np.arange(len(df))
+
+    keys = [numbers.to_numpy()] + [df[name].to_numpy() for name in within if name in df.columns]
+    first = pd.Series(positions).groupby(keys, sort=False).transform('min').to_numpy()
+    slot_positions = np.where(shared, first, positions)
+
+    order = np.argsort(slot_positions, kind='stable')
+    df = df.iloc[order].copy()
+    df['Call slot'] = pd.factorize(slot_positions[order])[0] + 1
+    df['Direct line'] = (numbers.to_numpy() != '')[order] & ~shared[order]
+    return df
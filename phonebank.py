@@ -0,0 +1,115 @@
+"""
+One command for every step of the pipeline.
+
+    python phonebank.py fetch [mps|roles]       # query the Parliament data platform
+    python phonebank.py contacts [mps|lords]    # build the contact sheets
+    python phonebank.py rank [mps|lords]        # ranked campaign lists
+    python phonebank.py gotv                    # Lords get-out-the-vote list
+    python phonebank.py report                  # Lords divisions report
+
+Each subcommand brings its outputs up to date like pipeline.py, running
+only stale stages and whatever they depend on, in this interpreter. Nothing
+heavier than the standard library is imported until a stage actually runs,
+so --help and up-to-date runs return almost immediately.
+"""
+
+import argparse
+import sys
+
+# Subcommand -> choice -> pipeline stage
+COMMANDS = {
+    'fetch': {'mps': 'fetch_mps', 'roles': 'fetch_roles'},
+    'contacts': {'mps': 'contact_mps', 'lords': 'contact_lords'},
+    'rank': {'mps': 'rank_mps', 'lords': 'rank_lords'},
+    'gotv': {'lords': 'lords_gotv'},
+    'report': {'lords': 'lords_report'},
+}
+
+HELP = {
+    'fetch': "fetch members and government roles from the Parliament data platform",
+    'contacts': "build the MP and Lords contact sheets",
+    'rank': "rank the contact sheets for the campaign",
+    'gotv': "build the Lords get-out-the-vote list",
+    'report': "merge the phonebanking list with Lords division votes",
+}
+
+RULES_COMMANDS = ('rank', 'gotv')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='phonebank', description="Generate parliamentary phonebanking data")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for command, choices in COMMANDS.items():
+        subparser = subparsers.add_parser(command, help=HELP[command], description=HELP[command])
+        if len(choices) > 1:
+            subparser.add_argument('which', nargs='*', choices=sorted(choices), help="default: all")
+        if command in RULES_COMMANDS:
+            subparser.add_argument('--rules', help="rules file to use instead of the default")
+        subparser.add_argument('--force', action='store_true', help="run even if the outputs are up to date")
+        subparser.add_argument('--dry-run', action='store_true', help="only show what would run")
+    return parser
+
+
+def stage_names(args):
+    """Pipeline stages named by the parsed arguments"""
+    choices = COMMANDS[args.command]
+    which = getattr(args, 'which', None) or sorted(choices)
+    return [choices[name] for name in which]
+
+
+def run_with_rules(names, rules_file, dry_run=False):
+    """
+    Run ranking stages against a rules file other than their default.
+
+    The pipeline only tracks the default rules, so these runs bypass it, and
+    the stages are forgotten so the next normal run rebuilds their outputs.
+    """
+    import pipeline
+
+    state = pipeline.load_state()
+    # Bring the contact sheets they read up to date as usual first
+    ran, succeeded = pipeline.run_stages(
+        [stage for stage in pipeline.selected_stages(names) if stage['name'] not in names], state,
+        dry_run=dry_run, execute=pipeline.run_stage_in_process,
+    )
+    if not succeeded:
+        raise SystemExit(1)
+
+    stages = [stage for stage in pipeline.STAGES if stage['name'] in names]
+    if dry_run:
+        for stage in stages:
+            print(f"🔁 {stage['name']}: rules from {rules_file}")
+        return ran + [stage['name'] for stage in stages]
+
+    for stage in stages:
+        print(f"▶️  {stage['name']}: python {stage['script']} {rules_file}")
+        state['stages'].pop(stage['name'], None)
+        pipeline.save_state(state)
+        if not pipeline.run_stage_in_process(stage, [rules_file]):
+            raise SystemExit(1)
+        ran.append(stage['name'])
+    return ran
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    names = stage_names(args)
+
+    if getattr(args, 'rules', None):
+        ran = run_with_rules(names, args.rules, dry_run=args.dry_run)
+    else:
+        import pipeline
+
+        ran, succeeded = pipeline.run_stages(
+            pipeline.selected_stages(names), pipeline.load_state(),
+            force=args.force, dry_run=args.dry_run, execute=pipeline.run_stage_in_process,
+        )
+        if not succeeded:
+            raise SystemExit(1)
+
+    if ran:
+        print(f"\n{'Would run' if args.dry_run else 'Ran'}: {', '.join(ran)}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,436 @@
+"""
+Incremental runner for the data pipeline.
+
+Each stage declares the files it reads and writes. A stage is re-run only
+when the content of one of its inputs has changed since its last successful
+run, or one of its outputs is missing or was changed by hand. As a stage's
+outputs are inputs of the stages after it, editing e.g.
+data/exclude_lords.txt rebuilds just the Lords rankings that use it.
+
+    python pipeline.py                  # bring every output up to date
+    python pipeline.py rank_mps         # just rank_mps and what it needs
+    python pipeline.py --force          # re-run everything
+    python pipeline.py --dry-run        # show what would run
+    python pipeline.py --parallel       # run the Commons and Lords branches at once
+    python pipeline.py --profile prof   # dump a cProfile profile of each stage to prof/
+    python pipeline.py --trace-memory   # record each stage's peak traced memory
+
+The fetch stages call live services and only run when named explicitly.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import runpy
+import subprocess
+import sys
+import time
+import traceback
+
+from output_files import read_manifest
+
+STATE_PATH = os.environ.get('PIPELINE_STATE', '.cache/pipeline.json')
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+GOV_POSITIONS = [
+    'data/government-positions/person.csv',
+    'data/government-positions/post.csv',
+    'data/government-positions/appointment.csv',
+    'data/government-positions/appointment_characteristics.csv',
+]
+
+CONTACT_CODE = ['instrumentation.py', 'members_xml.py', 'contact_sheets.py', 'output_files.py', 'phone_numbers.py', 'roster_cache.py', 'gov_positions.py', 'positions_snapshot.py']
+
+RANK_CODE = ['instrumentation.py', 'ranking_rules.py', 'scoring.py', 'call_outcomes.py', 'divisions.py', 'roster_cache.py', 'contact_sheets.py', 'output_files.py', 'phone_numbers.py', 'name_lists.py', 'name_keys.py', 'name_matcher.py']
+
+# Paths ending in .py are resolved against the code directory, everything
+# else against the working directory the scripts run in.
+STAGES = [
+    {
+        'name': 'fetch_mps',
+        'script': 'fetch_mps.py',
+        'inputs': ['instrumentation.py', 'gov_positions.py', 'fetch_cache.py', 'concurrent_fetch.py', 'output_files.py'],
+        'outputs': ['output/mps_data.csv'],
+        'fetch': True,
+    },
+    {
+        'name': 'fetch_roles',
+        'script': 'fetch_roles.py',
+        'inputs': ['instrumentation.py', 'fetch_cache.py', 'output_files.py'],
+        'outputs': ['output/roles_data.csv'],
+        'fetch': True,
+    },
+    {
+        'name': 'contact_mps',
+        'script': 'contact_mps.py',
+        'inputs': CONTACT_CODE + GOV_POSITIONS + ['data/mp_contact_details.xml'],
+        'outputs': ['output/contact_mps.csv'],
+    },
+    {
+        'name': 'contact_lords',
+        'script': 'contact_lords.py',
+        'inputs': CONTACT_CODE + GOV_POSITIONS + ['data/lords_contact_details.xml'],
+        'outputs': ['output/contact_lords.csv'],
+    },
+    {
+        'name': 'rank_mps',
+        'script': 'rank_mps.py',
+        'inputs': RANK_CODE + [
+            'rules/rank_mps.json', 'data/exclude_mps.txt', 'data/exclude_mps.pins.json', 'output/contact_mps.csv',
+        ],
+        'outputs': ['output/ranked_contact_mps.csv'],
+    },
+    {
+        'name': 'rank_lords',
+        'script': 'rank_lords.py',
+        # rank_lords.py reads the Commons contact sheet
+        'inputs': RANK_CODE + [
+            'rules/rank_lords.json', 'data/exclude_lords.txt', 'data/exclude_lords.pins.json', 'output/contact_mps.csv',
+        ],
+        'outputs': ['output/ranked_contact_lords.csv'],
+    },
+    {
+        'name': 'lords_gotv',
+        'script': 'get_lords_gotv.py',
+        'inputs': RANK_CODE + [
+            'rules/lords_gotv.json', 'data/exclude_lords.txt', 'data/exclude_lords.pins.json',
+            'data/gotv_lords.txt', 'data/gotv_lords.pins.json', 'output/contact_lords.csv',
+        ],
+        'outputs': ['output/ranked_contact_lords_gotv.csv'],
+    },
+    {
+        'name': 'lords_report',
+        'script': 'lords_report.py',
+        'inputs': ['instrumentation.py', 'divisions.py', 'name_keys.py', 'name_matcher.py', 'roster_cache.py', 'output_files.py', 'data/division-lords.csv', 'data/phonebanking-lords.csv'],
+        'outputs': ['output/lords_merged_report.csv'],
+    },
+]
+
+
+def resolve(path):
+    """Where a declared path lives on disk"""
+    if path.endswith('.py') or path.startswith('rules/'):
+        return os.path.join(CODE_DIR, path)
+    return path
+
+
+def stage_inputs(stage):
+    """Every file a stage depends on, including its own script"""
+    return [stage['script']] + stage['inputs']
+
+
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return {'files': {}, 'stages': {}}
+    with open(STATE_PATH, 'r') as f:
+        return json.load(f)
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH) or '.', exist_ok=True)
+    tmp_path = STATE_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def fingerprint(path, state):
+    """
+    Content hash of a file, or None if it doesn't exist.
+
+    The hash is reused while the file's size and mtime are unchanged, so
+    unchanged inputs aren't re-read on every run, and taken from the
+    manifest of a freshly written output sheet (see output_files).
+    """
+    real_path = resolve(path)
+    if not os.path.exists(real_path):
+        return None
+    stat = os.stat(real_path)
+    known = state['files'].get(real_path)
+    if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+        return known['sha256']
+    known = read_manifest(real_path)
+    if known and known['bytes'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+        return known['sha256']
+
+    digest = hashlib.sha256()
+    with open(real_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    state['files'][real_path] = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': digest.hexdigest(),
+    }
+    return digest.hexdigest()
+
+
+def stale_reason(stage, state):
+    """Why a stage needs to run, or None if it is up to date"""
+    previous = state['stages'].get(stage['name'])
+    if previous is None:
+        return "never run"
+    for path in stage_inputs(stage):
+        if fingerprint(path, state) != previous['inputs'].get(path):
+            return f"{path} changed"
+    for path in stage['outputs']:
+        current = fingerprint(path, state)
+        if current is None:
+            return f"{path} missing"
+        if current != previous['outputs'].get(path):
+            return f"{path} modified since last run"
+    return None
+
+
+def upstream(names):
+    """Named stages plus every stage producing one of their inputs, in pipeline order"""
+    producers = {output: stage['name'] for stage in STAGES for output in stage['outputs']}
+    by_name = {stage['name']: stage for stage in STAGES}
+    wanted = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name in wanted:
+            continue
+        wanted.add(name)
+        for path in by_name[name]['inputs']:
+            if path in producers:
+                pending.append(producers[path])
+    return [stage for stage in STAGES if stage['name'] in wanted]
+
+
+def selected_stages(names):
+    """Stages to consider for a run: the named ones, or everything but the fetches"""
+    known = {stage['name'] for stage in STAGES}
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(unknown)}. Known: {', '.join(sorted(known))}")
+    if not names:
+        names = [stage['name'] for stage in STAGES if not stage.get('fetch')]
+    return upstream(names)
+
+
+def run_stage(stage):
+    """Run a stage's script in a fresh interpreter, returning True if it succeeded"""
+    result = subprocess.run([sys.executable, resolve(stage['script'])])
+    return result.returncode == 0
+
+
+def run_stage_in_process(stage, args=()):
+    """
+    Run a stage's script in this interpreter, returning True if it succeeded.
+
+    Used by the parallel workers and phonebank.py so scripts see data
+    preloaded into shared modules (see gov_positions.preload) and reuse
+    already imported libraries.
+    """
+    path = resolve(stage['script'])
+    saved_argv = sys.argv
+    # Scripts read optional arguments from sys.argv, so only pass on args
+    sys.argv = [path, *args]
+    try:
+        runpy.run_path(path, run_name='__main__')
+        return True
+    except SystemExit as e:
+        return e.code in (None, 0)
+    except Exception:
+        traceback.print_exc(file=sys.stdout)
+        return False
+    finally:
+        sys.argv = saved_argv
+        # A stage that failed before finish() mustn't skew the next one's
+        # measurements. Imported here, not at the top, as instrumentation
+        # reads PIPELINE_PROFILE when first imported.
+        import instrumentation
+        instrumentation.stop_unfinished()
+
+
+def record_run(stage, inputs, state):
+    """Remember the fingerprints a stage ran against and produced"""
+    state['stages'][stage['name']] = {
+        'inputs': inputs,
+        'outputs': {path: fingerprint(path, state) for path in stage['outputs']},
+    }
+
+
+def run_stages(stages, state, force=False, dry_run=False, execute=run_stage, save=True):
+    """
+    Run the stale stages among stages, in order.
+
+    Returns the names of the stages that ran and whether they all succeeded;
+    stops at the first failure.
+    """
+    ran = []
+    for stage in stages:
+        reason = "forced" if force else stale_reason(stage, state)
+        if reason is None:
+            print(f"⏭️  {stage['name']}: up to date")
+            continue
+        print(f"🔁 {stage['name']}: {reason}")
+        if dry_run:
+            ran.append(stage['name'])
+            continue
+
+        # Fingerprint inputs before running, so edits made during the run
+        # are picked up next time
+        inputs = {path: fingerprint(path, state) for path in stage_inputs(stage)}
+        print(f"▶️  {stage['name']}: python {stage['script']}")
+        started = time.perf_counter()
+        succeeded = execute(stage)
+        elapsed = time.perf_counter() - started
+        if not succeeded:
+            print(f"❌ {stage['name']} failed after {elapsed:.1f}s")
+            return ran, False
+        print(f"✅ {stage['name']} finished in {elapsed:.1f}s")
+
+        record_run(stage, inputs, state)
+        if save:
+            save_state(state)
+        ran.append(stage['name'])
+    return ran, True
+
+
+def branches(stages):
+    """Split stages into independent branches: groups that pass no files between them"""
+    producers = {output: stage['name'] for stage in stages for output in stage['outputs']}
+    parent = {stage['name']: stage['name'] for stage in stages}
+
+    def find(name):
+        while parent[name] != name:
+            name = parent[name]
+        return name
+
+    for stage in stages:
+        for path in stage['inputs']:
+            if path in producers:
+                parent[find(stage['name'])] = find(producers[path])
+
+    grouped = {}
+    for stage in stages:
+        grouped.setdefault(find(stage['name']), []).append(stage)
+    return list(grouped.values())
+
+
+def _init_worker(positions):
+    import gov_positions
+    gov_positions.preload(positions)
+
+
+def _run_branch(names, force, dry_run):
+    """Worker: bring one branch up to date, returning its log, timing and fingerprints"""
+    by_name = {stage['name']: stage for stage in STAGES}
+    stages = [by_name[name] for name in names]
+    state = load_state()
+    log = io.StringIO()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        ran, succeeded = run_stages(
+            stages, state, force=force, dry_run=dry_run, execute=run_stage_in_process, save=False
+        )
+    return {
+        'names': names,
+        'ran': ran,
+        'succeeded': succeeded,
+        'elapsed': time.perf_counter() - started,
+        'log': log.getvalue(),
+        'stages': {name: state['stages'][name] for name in ran if name in state['stages']},
+        'files': state['files'],
+    }
+
+
+def run_parallel(stages, force=False, dry_run=False, workers=None):
+    """
+    Run independent branches concurrently in a process pool.
+
+    The government positions index is loaded once here and handed to every
+    worker, so the Commons and Lords contact builders don't each rebuild it.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    import gov_positions
+
+    groups = branches(stages)
+    state = load_state()
+
+    positions = None
+    if not dry_run and any(
+        stage['name'].startswith('contact_') and (force or stale_reason(stage, state))
+        for stage in stages
+    ):
+        print("Loading government positions data once for all branches...")
+        positions = gov_positions.get_positions()
+
+    ran = []
+    failed = False
+    started = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers or len(groups), initializer=_init_worker, initargs=(positions,)
+    ) as pool:
+        futures = [
+            pool.submit(_run_branch, [stage['name'] for stage in group], force, dry_run)
+            for group in groups
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            print(f"\n===== Branch {' → '.join(result['names'])} =====")
+            print(result['log'], end='')
+            status = "✅" if result['succeeded'] else "❌"
+            print(f"{status} Branch finished in {result['elapsed']:.1f}s")
+            state['files'].update(result['files'])
+            state['stages'].update(result['stages'])
+            ran.extend(result['ran'])
+            failed = failed or not result['succeeded']
+
+    if not dry_run:
+        save_state(state)
+    print(f"\n⏱️  Total wall time: {time.perf_counter() - started:.1f}s across {len(groups)} branch(es)")
+    if failed:
+        raise SystemExit(1)
+    return ran
+
+
+def run(names=(), force=False, dry_run=False, parallel=False, workers=None):
+    """Bring the selected stages up to date, returning the names of those that ran"""
+    stages = selected_stages(list(names))
+    if parallel:
+        return run_parallel(stages, force=force, dry_run=dry_run, workers=workers)
+
+    ran, succeeded = run_stages(stages, load_state(), force=force, dry_run=dry_run)
+    if not succeeded:
+        raise SystemExit(1)
+    return ran
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pipeline stages whose inputs changed")
+    parser.add_argument('stages', nargs='*', help="stages to bring up to date (default: all but fetches)")
+    parser.add_argument('--force', action='store_true', help="re-run stages even if up to date")
+    parser.add_argument('--dry-run', action='store_true', help="only show what would run")
+    parser.add_argument('--parallel', action='store_true', help="run independent branches concurrently")
+    parser.add_argument('--workers', type=int, help="maximum number of parallel branches")
+    parser.add_argument('--list', action='store_true', help="list stages and their inputs and outputs")
+    parser.add_argument('--profile', metavar='DIR', help="run each stage under cProfile, dumping profiles to DIR")
+    parser.add_argument('--trace-memory', action='store_true', help="record each stage's peak memory with tracemalloc")
+    args = parser.parse_args()
+
+    if args.profile:
+        # Read by instrumentation in each stage, whether run as a subprocess or in a worker
+        os.environ['PIPELINE_PROFILE'] = os.path.abspath(args.profile)
+    if args.trace_memory:
+        os.environ['PIPELINE_TRACEMALLOC'] = 'on'
+
+    if args.list:
+        for stage in STAGES:
+            print(f"{stage['name']}: {', '.join(stage_inputs(stage))} -> {', '.join(stage['outputs'])}")
+        return
+
+    ran = run(args.stages, force=args.force, dry_run=args.dry_run, parallel=args.parallel, workers=args.workers)
+    print(f"\n{'Would run' if args.dry_run else 'Ran'} {len(ran)} stage(s): {', '.join(ran) or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
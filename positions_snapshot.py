@@ -0,0 +1,128 @@
+"""
+Typed snapshot of the government positions dataset.
+
+The CSVs are converted once into typed frames: dates as datetimes,
+id_parliament as a nullable integer, low-cardinality text as categoricals
+and every UUID key dictionary-encoded to a compact integer code shared
+across tables, so joins run on integers. Missing keys are coded as -1.
+
+Run `python positions_snapshot.py` to (re)build it; load_snapshot()
+rebuilds it automatically when the CSVs change.
+"""
+
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from roster_cache import source_hash
+
+DATA_DIR = 'data/government-positions'
+
+SNAPSHOT_PATH = os.environ.get('POSITIONS_SNAPSHOT', '.cache/government-positions.pkl')
+
+TABLES = [
+    'appointment',
+    'appointment_characteristics',
+    'constituency',
+    'event',
+    'organisation',
+    'organisation_link',
+    'person',
+    'post',
+    'post_relationship',
+    'representation',
+    'representation_characteristics',
+]
+
+DATE_COLUMNS = ['start_date', 'end_date', 'date', 'link_start_date', 'link_end_date']
+
+CATEGORY_COLUMNS = [
+    'party', 'house', 'cabinet_status', 'gender', 'rank_equivalence',
+    'type', 'group_name', 'group_seniority', 'leave_reason',
+]
+
+BOOLEAN_COLUMNS = ['is_acting', 'is_on_leave']
+
+# Integer ids from other systems, not UUIDs
+EXTERNAL_ID_COLUMNS = ['id_parliament', 'id_ifg_website']
+
+
+def table_paths(data_dir=DATA_DIR):
+    """CSV path of every table, in TABLES order"""
+    return [os.path.join(data_dir, f"{table}.csv") for table in TABLES]
+
+
+def _is_key_column(column):
+    return column not in EXTERNAL_ID_COLUMNS and (column == 'id' or column.endswith('_id'))
+
+
+def convert(data_dir=DATA_DIR, path=SNAPSHOT_PATH):
+    """Read the CSVs, type them and write the snapshot to path"""
+    paths = table_paths(data_dir)
+    tables = {table: pd.read_csv(csv_path) for table, csv_path in zip(TABLES, paths)}
+
+    # One dictionary for all UUID keys so codes join across tables
+    key_values = [
+        df[column].dropna()
+        for df in tables.values()
+        for column in df.columns
+        if _is_key_column(column)
+    ]
+    uuids = pd.Index(pd.concat(key_values).unique())
+
+    for table, df in tables.items():
+        for column in df.columns:
+            if _is_key_column(column):
+                df[column] = uuids.get_indexer(df[column]).astype(np.int32)
+            elif column in EXTERNAL_ID_COLUMNS:
+                df[column] = df[column].astype('Int64')
+            elif column in DATE_COLUMNS:
+                df[column] = pd.to_datetime(df[column], errors='coerce')
+            elif column in CATEGORY_COLUMNS:
+                df[column] = df[column].astype('category')
+            elif column in BOOLEAN_COLUMNS:
+                df[column] = df[column].astype('boolean')
+
+    snapshot = {
+        'source_hash': source_hash(paths),
+        'uuids': uuids.to_numpy(dtype=object),
+        'tables': tables,
+    }
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    # Contact stages running in parallel may each rebuild a stale snapshot
+    with tempfile.NamedTemporaryFile('wb', dir=directory, prefix=os.path.basename(path) + '.',
+                                     suffix='.tmp', delete=False) as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f.name, path)
+    return snapshot
+
+
+def load_snapshot(data_dir=DATA_DIR, path=SNAPSHOT_PATH):
+    """Load the typed snapshot, converting the CSVs first if it is missing or stale"""
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+        if snapshot.get('source_hash') == source_hash(table_paths(data_dir)):
+            return snapshot
+        print("Government positions snapshot is out of date, rebuilding...")
+    return convert(data_dir, path)
+
+
+def decode_keys(codes, snapshot):
+    """Turn integer key codes back into their UUIDs"""
+    codes = np.asarray(codes)
+    decoded = snapshot['uuids'][np.where(codes >= 0, codes, 0)]
+    return np.where(codes >= 0, decoded, None)
+
+
+if __name__ == '__main__':
+    print(f"Converting government positions CSVs in {DATA_DIR}...")
+    snapshot = convert()
+    for table, df in snapshot['tables'].items():
+        print(f"  {table}: {len(df)} rows, {df.memory_usage(deep=True).sum() / 1024:.0f} KiB")
+    print(f"\n✅ Snapshot written: {SNAPSHOT_PATH} ({len(snapshot['uuids'])} distinct keys)")
@@ -0,0 +1,79 @@
+"""
+Rank several campaigns against the contact sheets in one run.
+
+A campaigns file (default rules/campaigns.json) lists each campaign's
+contact sheet, rules (a rules file as used by rank_mps.py, or the rules
+inline) and output file:
+
+    {"campaigns": [
+        {"name": "rank_mps", "contacts": "output/contact_mps.csv",
+         "rules": "rules/rank_mps.json", "output": "output/ranked_contact_mps.csv"},
+        ...
+    ]}
+
+Each contact sheet is read once, and campaigns on the same sheet share its
+name index and the masks of the conditions they have in common.
+
+    python rank_campaigns.py [campaigns.json]
+"""
+
+import os
+import sys
+
+from contact_sheets import read_contacts
+from instrumentation import start_stage
+from output_files import write_csv
+from ranking_rules import MaskCache, helper_columns, load_rules, rank_contacts, rank_labels
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def resolve_rules(rules):
+    """A campaign's rules: inline, or loaded from a file (rules/ paths are relative to the code)"""
+    if isinstance(rules, dict):
+        return rules
+    path = os.path.join(CODE_DIR, rules) if rules.startswith('rules/') else rules
+    return load_rules(path)
+
+
+def rank_campaign(campaign, contacts, masks):
+    """Rank one campaign and write its sheet, returning the ranked frame"""
+    with start_stage(campaign['name']) as metrics:
+        metrics.rows_in = len(contacts)
+        rules = resolve_rules(campaign['rules'])
+
+        contact_df_sorted = rank_contacts(contacts.copy(), rules, metrics, masks)
+        ranked_df = contact_df_sorted.drop(helper_columns(rules), axis=1)
+
+        labels = rank_labels(rules)
+        for rank, count in contact_df_sorted['priority_rank'].value_counts().sort_index().items():
+            print(f"  {rank}. {labels.get(rank, 'Unknown')}: {count}")
+
+        write_csv(ranked_df, campaign['output'])
+        metrics.finish(rows_out=len(ranked_df))
+    print(f"✅ {campaign['output']}: {len(ranked_df)} contacts")
+    return ranked_df
+
+
+def rank_campaigns(campaigns):
+    """Rank every campaign, reading each contact sheet once"""
+    contacts = {}
+    masks = {}
+    for campaign in campaigns:
+        path = campaign['contacts']
+        if path not in contacts:
+            contacts[path] = read_contacts(path)
+            masks[path] = MaskCache(contacts[path])
+            print(f"Loaded {len(contacts[path])} contacts from {path}")
+
+        print(f"\n📋 {campaign['name']}")
+        rank_campaign(campaign, contacts[path], masks[path])
+
+    reused = sum(cache.hits for cache in masks.values())
+    print(f"\n📊 Ranked {len(campaigns)} campaigns from {len(contacts)} contact sheets "
+          f"({reused} filter masks shared between campaigns)")
+
+
+if __name__ == '__main__':
+    campaigns_file = sys.argv[1] if len(sys.argv) > 1 else os.path.join(CODE_DIR, 'rules', 'campaigns.json')
+    rank_campaigns(load_rules(campaigns_file)['campaigns'])
@@ -0,0 +1,298 @@
+"""
+Declarative filter-and-rank rules for the ranking scripts.
+
+A rules file (see rules/*.json) lists, in order:
+- filters: conditions whose matching rows are dropped
+- flags: boolean columns added after filtering (e.g. GOTV priority)
+- tiers: first matching condition gives a row its priority_rank,
+  default_rank applies when none match
+- exclude_ranks: ranks whose rows are dropped after ranking
+- sort_by: columns the ranked list is ordered by
+
+Conditions are evaluated as boolean masks over whole columns:
+    {"column": "Party", "op": "in", "values": ["Reform UK"]}
+    {"column": "Phone", "op": "missing"}
+    {"column": "Government position", "op": "contains_any", "values": ["Prime Minister"]}
+    {"column": "is_gotv_priority", "op": "true"}
+    {"column": "Phone", "op": "shared_line", "min_members": 2}
+    {"all": [...]}, {"any": [...]}, {"not": {...}}
+Filters and flags may also match names from a list file:
+    {"column": "Full name", "op": "name_list", "path": "data/exclude_mps.txt", "threshold": 0.8}
+Lines are resolved to the rows' "id_column" (default id_parliament),
+reusing earlier runs' resolutions and operator pins (see name_lists.py).
+Or on voting history across a directory of division exports (see
+divisions.py), e.g. Not Content in at least 2 of the named divisions, or
+voting in at least half of them:
+    {"column": "id_parliament", "op": "votes", "path": "data/divisions",
+     "vote": "Not Content", "divisions": ["second-reading", "report"], "at_least": 2}
+    {"column": "id_parliament", "op": "turnout", "path": "data/divisions", "at_least": 0.5}
+Members are resolved against "roster" (default output/contact_lords.csv).
+
+Optionally, "call_slots": {"column": "Phone", "min_members": 2} batches
+contacts of the same tier (or the same values of the "within" columns)
+behind a shared number (e.g. a switchboard) into one call slot, adding
+'Call slot' and 'Direct line' columns to the output (see
+phone_numbers.call_slots).
+
+"scoring" orders contacts by a weighted score of party, flags, government
+seniority, division history and call outcomes instead of by sort_by, and
+keeps the top_k (see scoring.py). The output gains a 'Score' column.
+"""
+
+import hashlib
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+from divisions import ROSTER_PATH, load_divisions
+from name_lists import read_name_list, resolve_names
+from phone_numbers import call_slots, shared_line_mask
+from scoring import select_top
+
+
+def load_rules(path):
+    """Load a rules file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _text(series):
+    """Column as stripped strings, with missing values as ''"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    return series.fillna('').astype(str).str.strip()
+
+
+def condition_mask(df, condition):
+    """Evaluate a condition to a boolean mask over df"""
+    if 'all' in condition:
+        mask = pd.Series(True, index=df.index)
+        for part in condition['all']:
+            mask &= condition_mask(df, part)
+        return mask
+    if 'any' in condition:
+        mask = pd.Series(False, index=df.index)
+        for part in condition['any']:
+            mask |= condition_mask(df, part)
+        return mask
+    if 'not' in condition:
+        return ~condition_mask(df, condition['not'])
+
+    column = df[condition['column']]
+    op = condition['op']
+    values = condition.get('values', [])
+
+    if op == 'missing':
+        return _text(column) == ''
+    if op == 'present':
+        return _text(column) != ''
+    if op == 'equals':
+        return column == condition['value']
+    if op == 'in':
+        return column.isin(values)
+    if op == 'not_in':
+        return ~column.isin(values)
+    if op == 'contains_any':
+        # An empty alternation would match every row
+        if not values:
+            return pd.Series(False, index=df.index)
+        pattern = '|'.join(re.escape(value) for value in values)
+        return _text(column).str.contains(pattern, regex=True)
+    if op == 'true':
+        return column.fillna(False).astype(bool)
+    if op == 'name_list':
+        return name_list_mask(df, condition)
+    if op == 'shared_line':
+        return shared_line_mask(column, condition.get('min_members', 2))
+    if op in ('votes', 'turnout'):
+        return division_mask(column, condition)
+
+    raise ValueError(f"Unknown condition op: {op}")
+
+
+def name_list_mask(df, condition):
+    """Rows of the members named in a list file (see name_lists)"""
+    column = condition['column']
+    id_column = condition.get('id_column', 'id_parliament')
+    if id_column not in df.columns:
+        id_column = column
+    threshold = condition.get('threshold', 0.8)
+    mask = pd.Series(False, index=df.index)
+
+    try:
+        names = read_name_list(condition['path'])
+        print(f"Loaded {len(names)} names from {condition['path']}")
+    except Exception as e:
+        print(f"Warning: Could not load {condition['path']}: {e}")
+        return mask
+
+    if not names or df.empty:
+        return mask
+
+    # Resolutions against this roster are reused from earlier runs
+    resolved = resolve_names(condition['path'], names, df[column].tolist(), df[id_column].tolist(), threshold)
+    matched = [resolution for resolution in resolved.values() if resolution['id_parliament'] is not None]
+    methods = [resolution['method'] for resolution in resolved.values()]
+    print(f"Matched {len(matched)} of {len(names)} names from {condition['path']} "
+          f"({methods.count('key')} by name key, {methods.count('pinned')} pinned)")
+
+    return df[id_column].isin({resolution['id_parliament'] for resolution in matched})
+
+
+def division_mask(ids, condition):
+    """Rows whose member's voting history meets a votes or turnout condition"""
+    matrix = load_divisions(condition['path'], condition.get('roster', ROSTER_PATH))
+    divisions = condition.get('divisions')
+    if condition['op'] == 'turnout':
+        by_member = matrix.turnout(divisions) >= condition.get('at_least', 0.5)
+    else:
+        by_member = matrix.voted(condition['vote'], divisions, condition.get('at_least', 1))
+    return ids.map(by_member).fillna(False).astype(bool)
+
+
+def condition_columns(condition):
+    """Columns a condition reads"""
+    for key in ('all', 'any'):
+        if key in condition:
+            return set().union(*(condition_columns(part) for part in condition[key]))
+    if 'not' in condition:
+        return condition_columns(condition['not'])
+    columns = {condition['column']}
+    if condition['op'] == 'name_list':
+        columns.add(condition.get('id_column', 'id_parliament'))
+    return columns
+
+
+class MaskCache:
+    """
+    Condition masks shared by campaigns ranking the same contact sheet.
+
+    A mask is reused when the same condition is evaluated on the same rows
+    again, e.g. the filters several campaigns have in common. Conditions on
+    columns a campaign adds itself (flags) are always evaluated.
+    """
+
+    def __init__(self, contacts):
+        self.columns = set(contacts.columns)
+        self._masks = {}
+        self.hits = 0
+
+    def mask(self, df, condition):
+        if not condition_columns(condition) <= self.columns:
+            return condition_mask(df, condition)
+        rows = hashlib.sha1(np.ascontiguousarray(df.index.to_numpy()).tobytes()).hexdigest()
+        key = (rows, json.dumps(condition, sort_keys=True))
+        if key in self._masks:
+            self.hits += 1
+        else:
+            self._masks[key] = condition_mask(df, condition).to_numpy()
+        return pd.Series(self._masks[key], index=df.index)
+
+
+def _mask(df, condition, masks):
+    return condition_mask(df, condition) if masks is None else masks.mask(df, condition)
+
+
+def apply_filters(df, filters, metrics=None, masks=None):
+    """Drop the rows matched by each filter in turn, reporting how many each removed"""
+    for rule in filters:
+        # Each filter sees only the rows earlier filters kept, as name
+        # matching depends on which names are still in the roster
+        drop = _mask(df, rule['when'], masks)
+        count = int(drop.sum())
+        df = df[~drop]
+        print(rule.get('message', "Removed {count} rows").format(count=count))
+        if metrics is not None:
+            metrics.count(f"dropped.{rule['name']}", count)
+    return df
+
+
+def apply_flags(df, flags, metrics=None, masks=None):
+    """Add a boolean column for each flag"""
+    df = df.copy()
+    for rule in flags:
+        df[rule['name']] = _mask(df, rule['when'], masks).to_numpy()
+        count = int(df[rule['name']].sum())
+        print(rule.get('message', "Flagged {count} rows").format(count=count))
+        if metrics is not None:
+            metrics.count(f"flagged.{rule['name']}", count)
+    return df
+
+
+def assign_ranks(df, tiers, default, masks=None):
+    """Priority rank of every row: the rank of the first tier whose condition matches"""
+    if df.empty:
+        return np.array([], dtype=int)
+    if not tiers:
+        return np.full(len(df), default)
+    conditions = [_mask(df, tier['when'], masks).to_numpy() for tier in tiers]
+    ranks = [tier['rank'] for tier in tiers]
+    return np.select(conditions, ranks, default=default)
+
+
+def rank_labels(rules):
+    """Map of priority rank to its label, for summaries"""
+    labels = {}
+    for tier in rules.get('tiers', []):
+        labels.setdefault(tier['rank'], tier.get('label', 'Unknown'))
+    labels.setdefault(rules.get('default_rank', 0), rules.get('default_label', 'Unknown'))
+    return labels
+
+
+def rank_contacts(df, rules, metrics=None, masks=None):
+    """
+    Filter, flag, rank and sort a contact sheet according to rules, or
+    select the top scoring contacts if the rules have "scoring".
+
+    Returns the sorted frame with priority_rank and any flag columns still
+    attached (and batched into call slots if the rules ask for them); drop
+    helper_columns(rules) before writing it out. Drop, flag and rank counts
+    are recorded on metrics if given (see instrumentation), and masks shared
+    with other campaigns through a MaskCache if given.
+    """
+    print("Applying filters...")
+    df = apply_filters(df, rules.get('filters', []), metrics, masks)
+    print(f"Remaining after filtering: {len(df)}")
+
+    df = apply_flags(df, rules.get('flags', []), metrics, masks)
+
+    print("Applying priority ranking...")
+    df['priority_rank'] = assign_ranks(df, rules.get('tiers', []), rules.get('default_rank', 0), masks)
+
+    exclude_ranks = rules.get('exclude_ranks', [])
+    if exclude_ranks:
+        if metrics is not None:
+            metrics.count('dropped.excluded_ranks', df['priority_rank'].isin(exclude_ranks).sum())
+        df = df[~df['priority_rank'].isin(exclude_ranks)]
+
+    if 'scoring' in rules:
+        # The top_k by weighted score, without sorting the whole frame
+        print("Scoring contacts...")
+        df = select_top(df, rules['scoring'])
+        print(f"Selected {len(df)} top scoring contacts")
+    else:
+        df = df.sort_values(rules.get('sort_by', ['priority_rank']))
+
+    if metrics is not None:
+        for rank, count in df['priority_rank'].value_counts().items():
+            metrics.count(f"rank.{rank}", count)
+
+    if 'call_slots' in rules:
+        slots = rules['call_slots']
+        df = call_slots(df, slots.get('column', 'Phone'), slots.get('min_members', 2),
+                        slots.get('within', ['priority_rank']))
+        batched = int((~df['Direct line']).sum())
+        print(f"Batched {len(df)} contacts into {df['Call slot'].max() if len(df) else 0} call slots "
+              f"({batched} behind shared lines)")
+        if metrics is not None:
+            metrics.count('call_slots', df['Call slot'].nunique())
+            metrics.count('direct_lines', df['Direct line'].sum())
+
+    return df
+
+
+def helper_columns(rules):
+    """Columns rank_contacts adds that don't belong in the output"""
+    return ['priority_rank'] + [rule['name'] for rule in rules.get('flags', [])]
@@ -0,0 +1,97 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+# Where parsed rosters and joined frames are kept between runs
+CACHE_DIR = os.environ.get('ROSTER_CACHE_DIR', '.cache/roster')
+
+# Oldest entries are evicted once the cache grows past this size
+MAX_CACHE_BYTES = int(os.environ.get('ROSTER_CACHE_MAX_MB', '256')) * 1024 * 1024
+
+# Set ROSTER_CACHE=off to always rebuild
+CACHE_ENABLED = os.environ.get('ROSTER_CACHE', 'on').lower() not in ('0', 'off', 'false', 'no')
+
+
+def source_hash(paths):
+    """Hash the contents of the given files, in order"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _entry_path(name, key):
+    return os.path.join(CACHE_DIR, f"{name}-{key[:32]}.pkl")
+
+
+def evict(max_bytes=None):
+    """Remove least recently used entries until the cache fits in max_bytes"""
+    if max_bytes is None:
+        max_bytes = MAX_CACHE_BYTES
+    if not os.path.isdir(CACHE_DIR):
+        return 0
+
+    entries = []
+    for filename in os.listdir(CACHE_DIR):
+        if not filename.endswith('.pkl'):
+            continue
+        path = os.path.join(CACHE_DIR, filename)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            # Evicted by another process in the meantime
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        total -= size
+    return removed
+
+
+def cached(name, sources, build):
+    """
+    Return build(), reusing a previous result if none of the source files changed.
+
+    Results are pickled under CACHE_DIR keyed by the content hash of the
+    sources, so editing any input invalidates the entry automatically.
+    Include the calling script in sources so that logic changes do too.
+    """
+    if not CACHE_ENABLED:
+        return build()
+
+    path = _entry_path(name, source_hash(sources))
+    if os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+            # Mark as recently used for eviction
+            os.utime(path)
+            print(f"Loaded {name} from cache")
+            return result
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable cache entry {path}: {e}")
+
+    result = build()
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # A temporary file of its own, as stages running in parallel may build
+    # the same entry at once
+    with tempfile.NamedTemporaryFile('wb', dir=CACHE_DIR, prefix=os.path.basename(path) + '.',
+                                     suffix='.tmp', delete=False) as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f.name, path)
+    evict()
+    return result
@@ -0,0 +1,134 @@
+"""
+Weighted numeric scores for contacts, and top-k selection by score.
+
+Instead of (or as well as) tiers, a rules file can score every contact as
+a weighted sum of features, each computed over whole columns, and keep the
+top_k highest scores:
+
+    "scoring": {
+      "top_k": 200,
+      "weights": {
+        "party": {"Green Party": 3, "Labour": 2, "Crossbench": 2},
+        "flags": {"is_gotv_priority": 10},
+        "seniority": -4,
+        "divisions": [
+          {"path": "data/division-lords.csv", "vote": "Not Content", "weight": 5},
+          {"path": "data/division-lords.csv", "weight": 1}
+        ],
+        "outcomes": {"voicemail": -1, "no_answer": -0.5}
+      }
+    }
+
+- party: weight of each party, 0 for parties not listed
+- flags: weight of each flag column (see ranking_rules) when set
+- seniority: weight times the member's most senior government post, from 1
+  for the Prime Minister down to near 0 for the most junior post
+  (rank_equivalence_value in post.csv), 0 without one
+- divisions: weight times the share of the divisions (all in path, or the
+  named "divisions") the member cast "vote" in, or voted in at all if no
+  vote is given (see divisions.py)
+- outcomes: weight of the member's last call outcome in the outcome store
+  (see call_outcomes.py)
+
+The top_k are found by partial selection (numpy argpartition) and only
+they are sorted, highest score first, ties in their previous order.
+"""
+
+import numpy as np
+
+import gov_positions
+from call_outcomes import load_store
+from divisions import ROSTER_PATH, load_divisions
+
+
+def party_feature(df, weights):
+    parties = df['Party'].astype(object)
+    return parties.map(weights).fillna(0).to_numpy(dtype=float)
+
+
+def flags_feature(df, weights):
+    score = np.zeros(len(df))
+    for flag, weight in weights.items():
+        score += weight * df[flag].fillna(False).to_numpy(dtype=bool)
+    return score
+
+
+def seniority(ids):
+    """Seniority of each member's most senior current post, 1 for the most senior, 0 for none"""
+    summary = gov_positions.get_positions().summary_as_of(gov_positions.as_of_date())
+    if summary.empty:
+        return np.zeros(len(ids))
+    ranks = summary.set_index(summary['id_parliament'].astype('int64'))['rank_equivalence_value']
+    most_junior = ranks.max()
+    member_ranks = ids.astype('int64').map(ranks)
+    return ((most_junior + 1 - member_ranks) / most_junior).fillna(0).to_numpy(dtype=float)
+
+
+def divisions_feature(df, entries):
+    score = np.zeros(len(df))
+    for entry in entries:
+        matrix = load_divisions(entry['path'], entry.get('roster', ROSTER_PATH))
+        divisions = entry.get('divisions')
+        if 'vote' in entry:
+            total = len(divisions) if divisions is not None else len(matrix.divisions)
+            share = matrix.counts(entry['vote'], divisions) / max(total, 1)
+        else:
+            share = matrix.turnout(divisions)
+        score += entry['weight'] * df['id_parliament'].map(share).fillna(0).to_numpy(dtype=float)
+    return score
+
+
+def outcomes_feature(df, weights):
+    outcomes = {key: record['outcome'] for key, record in load_store()['members'].items()}
+    member_outcomes = df['id_parliament'].astype(str).map(outcomes)
+    return member_outcomes.map(weights).fillna(0).to_numpy(dtype=float)
+
+
+FEATURES = {
+    'party': party_feature,
+    'flags': flags_feature,
+    'seniority': lambda df, weight: weight * seniority(df['id_parliament']),
+    'divisions': divisions_feature,
+    'outcomes': outcomes_feature,
+}
+
+
+def score_contacts(df, weights):
+    """Score of every row: the weighted sum of the configured features"""
+    unknown = set(weights) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Unknown scoring features: {', '.join(sorted(unknown))}")
+    score = np.zeros(len(df))
+    for name, feature_weights in weights.items():
+        score += FEATURES[name](df, feature_weights)
+    return score
+
+
+def top_k(scores, k=None):
+    """
+    Positions of the k highest scores, highest first, ties in position order.
+
+    Only the selected positions are sorted; the rest are split off by
+    partial selection in linear time.
+    """
+    scores = np.asarray(scores, dtype=float)
+    if k is None or k >= len(scores):
+        chosen = np.arange(len(scores))
+    elif k <= 0:
+        return np.array([], dtype=np.int64)
+    else:
+        kth = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        above = np.flatnonzero(scores > kth)
+        # Of the scores tied with the k-th, the earliest positions make the cut
+        tied = np.flatnonzero(scores == kth)[:k - len(above)]
+        chosen = np.concatenate([above, tied])
+    return chosen[np.lexsort((chosen, -scores[chosen]))]
+
+
+def select_top(df, scoring):
+    """The top_k rows of df by score, highest first, with a 'Score' column"""
+    scores = score_contacts(df, scoring.get('weights', {}))
+    order = top_k(scores, scoring.get('top_k'))
+    df = df.iloc[order].copy()
+    df['Score'] = np.round(scores[order], 4)
+    return df
@@ -0,0 +1,197 @@
+"""
+Split a ranked contact sheet into balanced call sheets for K volunteers.
+
+Every shard gets a similar number of contacts from each priority tier and
+a similar expected calling time. Assignments are saved next to the shards
+(assignments.json) and kept on later runs, so regenerating the ranked list
+only places new contacts and drops ones no longer on it; contacts a
+volunteer already holds stay with them. --rebalance starts afresh.
+
+The ranked sheets are in priority order but have no tier column, so unless
+--tier-column names one, contacts are banded by their position in the
+list (--bands, default 10).
+
+Expected call time is CALL_MINUTES per contact, plus SHARED_LINE_MINUTES
+for numbers several contacts share (an office or switchboard to get
+through first), compared in canonical form as for call slots (see
+phone_numbers).
+
+    python shard_sheets.py output/ranked_contact_mps.csv --volunteers 8
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import tempfile
+from collections import Counter
+from contextlib import ExitStack
+
+import pandas as pd
+
+from instrumentation import start_stage
+from output_files import OutputWriter, check_output, check_rows, manifest_path, open_text
+from phone_numbers import shared_line_mask
+
+CALL_MINUTES = 5
+SHARED_LINE_MINUTES = 3
+
+OUTPUT_DIR = os.path.join('output', 'shards')
+
+
+def read_sheet(path):
+    """Header and rows of a CSV sheet, checked against its manifest"""
+    manifest = check_output(path)
+    with open_text(path) as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = list(reader)
+    check_rows(path, manifest, len(rows))
+    return header, rows
+
+
+def contact_keys(header, rows):
+    """Stable key of each contact: id_parliament, or the name if there is none"""
+    column = header.index('id_parliament') if 'id_parliament' in header else header.index('Full name')
+    return [row[column] for row in rows]
+
+
+def contact_tiers(header, rows, tier_column=None, bands=10):
+    """Priority tier of each row, from a column or the row's position band"""
+    if tier_column:
+        column = header.index(tier_column)
+        return [row[column] for row in rows]
+    band_size = max(1, -(-len(rows) // bands))
+    return [str(position // band_size) for position in range(len(rows))]
+
+
+def call_minutes(header, rows, phone_column='Phone'):
+    """Expected minutes to call each contact"""
+    if phone_column not in header:
+        return [CALL_MINUTES] * len(rows)
+    column = header.index(phone_column)
+    shared = shared_line_mask(pd.Series([row[column] for row in rows], dtype=object))
+    return [CALL_MINUTES + (SHARED_LINE_MINUTES if is_shared else 0) for is_shared in shared.tolist()]
+
+
+def load_assignments(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['assignments']
+
+
+def save_assignments(path, volunteers, assignments):
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(path) or '.',
+                                     prefix=os.path.basename(path) + '.', suffix='.tmp', delete=False) as f:
+        json.dump({'volunteers': volunteers, 'assignments': assignments}, f, indent=2, sort_keys=True)
+    os.replace(f.name, path)
+
+
+def assign_shards(keys, tiers, minutes, volunteers, previous=None):
+    """
+    Shard of every contact.
+
+    Contacts keep a previous shard if it still exists. The rest are placed,
+    in list order, on the shard with the fewest contacts in their tier, then
+    the least calling time, then the lowest number.
+    """
+    previous = previous or {}
+    tier_counts = [Counter() for _ in range(volunteers)]
+    shard_minutes = [0] * volunteers
+    shards = [None] * len(keys)
+
+    for position, key in enumerate(keys):
+        shard = previous.get(key)
+        if shard is not None and shard < volunteers:
+            shards[position] = shard
+            tier_counts[shard][tiers[position]] += 1
+            shard_minutes[shard] += minutes[position]
+
+    for position, key in enumerate(keys):
+        if shards[position] is not None:
+            continue
+        tier = tiers[position]
+        shard = min(range(volunteers), key=lambda s: (tier_counts[s][tier], shard_minutes[s], s))
+        shards[position] = shard
+        tier_counts[shard][tier] += 1
+        shard_minutes[shard] += minutes[position]
+
+    return shards
+
+
+def write_shards(header, rows, shards, volunteers, directory, stem):
+    """Write each row straight to its shard's file, returning the file paths"""
+    paths = [os.path.join(directory, f"{stem}-{shard + 1:02d}.csv") for shard in range(volunteers)]
+    # Each sheet replaces the previous one only once every sheet is written
+    with ExitStack() as stack:
+        writers = [stack.enter_context(OutputWriter(path)) for path in paths]
+        for writer in writers:
+            writer.write_header(header)
+        for row, shard in zip(rows, shards):
+            writers[shard].write_row(row)
+    return paths
+
+
+def shard_sheet(path, volunteers, output_dir=OUTPUT_DIR, tier_column=None, bands=10, rebalance=False):
+    """Split a ranked sheet into volunteer sheets, returning their paths"""
+    with start_stage('shard_sheets') as metrics:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        directory = os.path.join(output_dir, stem)
+        os.makedirs(directory, exist_ok=True)
+        assignments_path = os.path.join(directory, 'assignments.json')
+
+        header, rows = read_sheet(path)
+        metrics.rows_in = len(rows)
+        keys = contact_keys(header, rows)
+        tiers = contact_tiers(header, rows, tier_column, bands)
+        minutes = call_minutes(header, rows)
+
+        previous = {} if rebalance else load_assignments(assignments_path)
+        shards = assign_shards(keys, tiers, minutes, volunteers, previous)
+        kept = sum(previous.get(key) == shard for key, shard in zip(keys, shards))
+        metrics.count('kept_assignments', kept)
+
+        paths = write_shards(header, rows, shards, volunteers, directory, stem)
+
+        # Only once the new sheets are in place, remove those of volunteers
+        # no longer in use
+        for name in os.listdir(directory):
+            match = re.fullmatch(re.escape(stem) + r'-(\d+)\.csv', name)
+            if match and int(match.group(1)) > volunteers:
+                os.remove(os.path.join(directory, name))
+                if os.path.exists(manifest_path(os.path.join(directory, name))):
+                    os.remove(manifest_path(os.path.join(directory, name)))
+
+        save_assignments(assignments_path, volunteers, dict(zip(keys, shards)))
+        metrics.finish(rows_out=len(rows), volunteers=volunteers)
+
+    print(f"✅ Split {len(rows)} contacts from {path} into {volunteers} sheets in {directory} "
+          f"({kept} kept their previous volunteer)")
+    counts = Counter(shards)
+    shard_minutes = Counter()
+    for shard, contact_minutes in zip(shards, minutes):
+        shard_minutes[shard] += contact_minutes
+    for shard, shard_path in enumerate(paths):
+        print(f"  {os.path.basename(shard_path)}: {counts[shard]} contacts, ~{shard_minutes[shard]} min")
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split a ranked contact sheet into balanced volunteer sheets")
+    parser.add_argument('sheet', help="ranked contact sheet, e.g. output/ranked_contact_mps.csv")
+    parser.add_argument('--volunteers', '-k', type=int, required=True, help="number of volunteer sheets")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--tier-column', help="column holding each contact's priority tier")
+    parser.add_argument('--bands', type=int, default=10, help="position bands used as tiers without a tier column")
+    parser.add_argument('--rebalance', action='store_true', help="ignore previous assignments")
+    args = parser.parse_args()
+    if args.volunteers < 1:
+        parser.error("--volunteers must be at least 1")
+
+    shard_sheet(args.sheet, args.volunteers, args.output_dir, args.tier_column, args.bands, args.rebalance)
+
+
+if __name__ == '__main__':
+    main()
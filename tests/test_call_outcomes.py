@@ -0,0 +1,102 @@
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from call_outcomes import (
+    OUTCOME_EXAMPLES, check_patterns, classify_outcomes, due_at, ingest, load_store, queue_status, read_queue,
+    refresh_queue,
+)
+from contact_sheets import write_contacts
+
+START = datetime(2025, 1, 20, 10, 0)
+
+
+def export(rows):
+    return pd.DataFrame({
+        'id_parliament': pd.array([member_id for member_id, _ in rows], dtype='Int64'),
+        'note': [note for _, note in rows],
+        'email_sent': [False] * len(rows),
+    })
+
+
+def ranked_sheet(path, size):
+    df = pd.DataFrame({
+        'id_parliament': range(100, 100 + size),
+        'First name': 'Lord',
+        'Last name': [f'Member{i}' for i in range(size)],
+        'Full name': [f'Lord Member{i}' for i in range(size)],
+        'Party': ['Labour', 'Crossbench'] * (size // 2),
+        'Government position': '',
+        'Phone': '020 7219 5353',
+        'Parliamentary phone number': '020 7219 5353',
+        'Constituency phone number': '',
+        'Parliamentary email address': '',
+        'Constituency email address': '',
+    })
+    write_contacts(df, path)
+
+
+def test_examples_classify_as_expected():
+    assert check_patterns() == []
+    notes = pd.Series(['', '  ', 'Voicemail'])
+    assert classify_outcomes(notes).tolist() == ['', '', 'voicemail']
+    assert len(OUTCOME_EXAMPLES) == 44
+
+
+def test_attempts_only_count_new_notes():
+    store = load_store('/nonexistent/outcomes.json')
+    assert ingest(store, export([(1, 'Voicemail')]), START) == ['1']
+    assert ingest(store, export([(1, 'Voicemail')]), START + timedelta(hours=1)) == []
+    assert store['members']['1']['attempts'] == 1
+    assert ingest(store, export([(1, 'No answer')]), START + timedelta(hours=3)) == ['1']
+    record = store['members']['1']
+    assert (record['attempts'], record['outcome'], record['last_call']) == (2, 'no_answer', '2025-01-20T13:00:00')
+
+
+def test_unchanged_note_is_reclassified():
+    store = load_store('/nonexistent/outcomes.json')
+    ingest(store, export([(1, 'Voicemail')]), START)
+    store['members']['1']['outcome'] = 'email_only'
+    assert ingest(store, export([(1, 'Voicemail')]), START + timedelta(hours=1)) == ['1']
+    assert store['members']['1']['outcome'] == 'voicemail'
+    assert store['members']['1']['attempts'] == 1
+
+
+def test_backoff_doubles_with_each_attempt():
+    record = {'outcome': 'voicemail', 'attempts': 1, 'last_call': START.isoformat()}
+    assert due_at(record) == START + timedelta(minutes=120)
+    assert due_at(dict(record, attempts=3)) == START + timedelta(minutes=480)
+    assert due_at(dict(record, outcome='no_answer')) == START + timedelta(minutes=30)
+    assert due_at(dict(record, outcome='completed')) is None
+
+
+def test_queue_status():
+    store = load_store('/nonexistent/outcomes.json')
+    ingest(store, export([(1, 'Done'), (2, 'No answer'), (3, 'Email only'), (4, 'Number not parlimentary')]), START)
+    ids = pd.Series([1, 2, 3, 4, 5])
+    assert queue_status(ids, store, START + timedelta(minutes=10)).tolist() == [
+        'completed', 'held', 'email_only', 'queued', 'queued']
+    assert queue_status(ids, store, START + timedelta(minutes=30))[1] == 'requeued'
+
+
+def test_incremental_refresh_matches_rebuild(tmp_path):
+    rng = random.Random(3)
+    ranked = str(tmp_path / 'ranked.csv')
+    ranked_sheet(ranked, 60)
+    incremental, rebuilt = str(tmp_path / 'incremental.csv'), str(tmp_path / 'rebuilt.csv')
+    notes = [note for note, _ in OUTCOME_EXAMPLES] + ['Voicemail'] * 10 + ['No answer'] * 10
+
+    store = load_store(str(tmp_path / 'outcomes.json'))
+    now = START
+    refresh_queue(ranked, store, now, incremental, changed=set())
+    for _ in range(40):
+        now += timedelta(minutes=rng.choice([0, 5, 30, 90, 240]))
+        rows = [(rng.randrange(95, 165), rng.choice(notes)) for _ in range(rng.randrange(0, 6))]
+        changed = set(ingest(store, export(rows), now))
+        counts = refresh_queue(ranked, store, now, incremental, changed=changed)
+        assert counts == refresh_queue(ranked, store, now, rebuilt)
+        with open(incremental, 'rb') as a, open(rebuilt, 'rb') as b:
+            assert a.read() == b.read()
+
+    assert len(read_queue(incremental)) < 60
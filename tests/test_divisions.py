@@ -0,0 +1,13 @@
+from divisions import resolve_members
+
+ROSTER = ['Lord Smith of Kew', 'Lord Smith of  Kew ', 'Baroness Jones of Moulsecoomb', 'Lord Murphy of Torfaen']
+
+
+def test_fuzzy_match_to_a_shared_key_is_unresolved():
+    # Both Lord Smiths of Kew have the key the misspelling is closest to
+    assert resolve_members(['Lord Smyth of Kew'], ROSTER, [1, 2, 3, 4]) == [None]
+
+
+def test_fuzzy_match_to_a_single_member():
+    names = ['Baroness Jones of Moulsecombe', 'Lord Murphy of Torfaen', 'Lord Nobody']
+    assert resolve_members(names, ROSTER, [1, 2, 3, 4]) == [3, 4, None]
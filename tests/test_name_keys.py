@@ -0,0 +1,64 @@
+import json
+import os
+
+from name_keys import NameIndex, name_key, parse_name
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROSTER = [
+    'Lord Murphy',
+    'Lord Murphy of Torfaen',
+    'Lord Smith of Hindhead',
+    'Lord David Anderson of Ipswich',
+    'Baroness Kennedy of The Shaws',
+    'Lord Goldsmith',
+    'Lord Goldsmith of Richmond Park',
+    'Ms Diane Abbott',
+]
+
+
+def index():
+    return NameIndex(ROSTER, list(range(len(ROSTER))))
+
+
+def test_keys_drop_honorifics_and_given_names():
+    assert parse_name('Lord David Anderson of Ipswich').keys == ('anderson of ipswich', 'anderson')
+    assert parse_name('The Earl of Courtown').keys == ('earl of courtown',)
+    assert parse_name('Ms Diane Abbott').keys == ('diane abbott', 'abbott')
+    assert name_key('David Anderson, Baron Anderson of Ipswich') == 'anderson of ipswich'
+
+
+def test_shared_surname_is_ambiguous():
+    # Lord Murphy and Lord Murphy of Torfaen both answer to "Murphy"
+    assert index().lookup('Paul Murphy') is None
+    assert index().lookup('Murphy') is None
+
+
+def test_exact_title_wins_over_shared_surname():
+    assert index().lookup('Lord Murphy') == 0
+    assert index().lookup('Lord Murphy of Torfaen') == 1
+    assert index().lookup('Lord Goldsmith') == 5
+    assert index().lookup('Lord Goldsmith of Richmond Park') == 6
+
+
+def test_given_name_must_match():
+    assert index().lookup('David Smith') is None
+    assert index().lookup('Lord Smith') == 2
+    assert index().lookup('David Anderson') == 3
+    assert index().lookup('Peter Anderson') is None
+    assert index().lookup('Diane Abbott') == 7
+
+
+def test_unknown_designation_is_not_guessed():
+    assert index().lookup('Baroness Kennedy of Cradley') is None
+    assert index().lookup('Baroness Kennedy of the Shaws') == 4
+
+
+def test_paul_murphy_is_pinned():
+    # The Lords roster can't tell "Paul Murphy" apart by key, so the list pins him
+    with open(os.path.join(REPO_DIR, 'data', 'exclude_lords.pins.json'), encoding='utf-8') as f:
+        pins = json.load(f)
+    with open(os.path.join(REPO_DIR, 'data', 'exclude_lords.txt'), encoding='utf-8') as f:
+        lines = {line.strip() for line in f}
+    assert pins['Paul Murphy'] == 546
+    assert set(pins) <= lines
@@ -0,0 +1,45 @@
+import random
+import string
+
+from name_matcher import NameMatcher, similarity
+
+
+def linear_scan(names, target, threshold):
+    """The best match by scanning the roster, ties to roster order"""
+    best_match, best_score = None, 0
+    for name in names:
+        score = similarity(target, name)
+        if score >= threshold and score > best_score:
+            best_match, best_score = name, score
+    return best_match, best_score
+
+
+def random_name(rng):
+    title = rng.choice(['Lord', 'Baroness', 'Ms', 'Mr', ''])
+    words = [''.join(rng.choice('aeiourstnlm') for _ in range(rng.randint(3, 8))).title() for _ in range(2)]
+    return ' '.join(part for part in [title] + words if part)
+
+
+def test_matches_linear_scan_on_random_roster():
+    rng = random.Random(1)
+    roster = [random_name(rng) for _ in range(300)]
+    # Duplicates and near-duplicates, so ties and close scores come up
+    roster += rng.sample(roster, 20)
+    roster += [name[:-1] + 'x' for name in rng.sample(roster, 20)]
+    matcher = NameMatcher(roster)
+
+    targets = rng.sample(roster, 50) + [random_name(rng) for _ in range(50)]
+    targets += [name.upper() + ' ' for name in rng.sample(roster, 10)]
+    targets += [''.join(rng.choice(string.ascii_lowercase + ' ') for _ in range(12)) for _ in range(10)]
+    for threshold in (0.5, 0.8, 0.95):
+        for target in targets:
+            assert matcher.match(target, threshold) == linear_scan(roster, target, threshold), target
+
+
+def test_ties_resolve_to_roster_order():
+    matcher = NameMatcher(['Lord Abc', 'Lord Abd', 'Lord Abc'])
+    assert matcher.match('Lord Abe', threshold=0.5) == ('Lord Abc', similarity('Lord Abe', 'Lord Abc'))
+
+
+def test_no_match_below_threshold():
+    assert NameMatcher(['Lord Aberdare']).match('Baroness Smith', threshold=0.9) == (None, 0)
@@ -0,0 +1,104 @@
+import itertools
+import random
+
+import pytest
+
+from next_contacts import ContactQueue
+
+
+class SortedQueue:
+    """The queue ContactQueue should behave as, kept as a plain dict and sorted on every read"""
+
+    def __init__(self, ids, priorities):
+        self.queued = {member_id: (priority, order) for order, (member_id, priority) in enumerate(zip(ids, priorities))}
+        self.handed_out = {}
+        self.order = itertools.count(len(ids))
+
+    def next_ids(self, n):
+        return sorted(self.queued, key=self.queued.get)[:n]
+
+    def take(self, n):
+        page = self.next_ids(n)
+        for member_id in page:
+            self.handed_out[member_id] = self.queued.pop(member_id)[0]
+        return page
+
+    def remove(self, member_id):
+        self.queued.pop(member_id, None)
+        self.handed_out.pop(member_id, None)
+
+    def reprioritise(self, member_id, priority):
+        self.queued.pop(member_id, None)
+        self.handed_out.pop(member_id, None)
+        self.queued[member_id] = (priority, next(self.order))
+
+    def release(self, member_id):
+        self.reprioritise(member_id, self.handed_out[member_id])
+
+
+def ids_of(rows):
+    return [row['id_parliament'] for row in rows]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_interleavings_match_sorted_reference(seed):
+    rng = random.Random(seed)
+    ids = list(range(1000, 1200))
+    # Few distinct priorities, so ties are common
+    priorities = [rng.randrange(10) for _ in ids]
+    queue = ContactQueue([{'id_parliament': member_id} for member_id in ids], priorities)
+    reference = SortedQueue(ids, priorities)
+    removed = set()
+
+    for _ in range(2000):
+        op = rng.random()
+        if op < 0.2:
+            n = rng.randrange(6)
+            assert ids_of(queue.take(n)) == reference.take(n)
+        elif op < 0.3:
+            n = rng.randrange(6)
+            assert ids_of(queue.peek(n)) == reference.next_ids(n)
+        elif op < 0.5:
+            member_id = rng.choice(ids)
+            queue.remove(member_id)
+            reference.remove(member_id)
+            removed.add(member_id)
+        elif op < 0.75:
+            member_id = rng.choice(ids)
+            if member_id in removed:
+                with pytest.raises(KeyError):
+                    queue.reprioritise(member_id, 0)
+                continue
+            priority = rng.randrange(10)
+            queue.reprioritise(member_id, priority)
+            reference.reprioritise(member_id, priority)
+        elif reference.handed_out:
+            member_id = rng.choice(sorted(reference.handed_out))
+            queue.release(member_id)
+            reference.release(member_id)
+        assert len(queue) == len(reference.queued)
+        assert all((member_id in queue) == (member_id in reference.queued) for member_id in ids)
+
+    # Whatever is left comes out once each, never a removed or stale entry
+    rest = ids_of(queue.take(len(ids)))
+    assert rest == reference.take(len(ids))
+    assert len(rest) == len(set(rest)) and not set(rest) & removed
+
+
+def test_release_needs_a_handed_out_contact():
+    queue = ContactQueue([{'id_parliament': 1}, {'id_parliament': 2}])
+    with pytest.raises(KeyError):
+        queue.release(1)
+    queue.take(1)
+    queue.remove(1)
+    with pytest.raises(KeyError):
+        queue.release(1)
+
+
+def test_heap_is_compacted():
+    queue = ContactQueue([{'id_parliament': member_id} for member_id in range(100)])
+    for _ in range(20):
+        for member_id in range(100):
+            queue.reprioritise(member_id, -member_id)
+    assert len(queue._heap) <= 2 * len(queue) + 64
+    assert ids_of(queue.take(3)) == [99, 98, 97]
@@ -0,0 +1,68 @@
+import pandas as pd
+
+from phone_numbers import PhoneIndex, call_slots, normalize_phones, shared_line_mask
+
+# Numbers as the exports write them, and their canonical form
+FORMATS = [
+    ('020 7219 4426', '020 7219 4426'),
+    ('0207 219 3000', '020 7219 3000'),
+    ('2072193775', '020 7219 3775'),
+    ('004420 7219 5353', '020 7219 5353'),
+    ('+44 (0)20 7219 5353', '020 7219 5353'),
+    ('0161 624 4248', '0161 624 4248'),
+    ('01512841160', '0151 284 1160'),
+    ('0114 3038050', '0114 303 8050'),
+    ('0247 7180 425', '024 7718 0425'),
+    ('028 90 500 890', '028 9050 0890'),
+    ('01746 555025', '01746 555025'),
+    ('01354 656 635', '01354 656635'),
+    ('01785 59 49 49', '01785 594949'),
+    ('07700 900123', '07700 900123'),
+    # Several numbers or notes are kept as written
+    ('0207 219 7585; 07879 451608', '0207 219 7585; 07879 451608'),
+    ('Call: 01224 633285; Text: 07464 606650', 'Call: 01224 633285; Text: 07464 606650'),
+    ('01603 733182 (casework); 01603 531584 (general)', '01603 733182 (casework); 01603 531584 (general)'),
+    ('  020  7219 ext 3000 ', '020 7219 ext 3000'),
+    # No digits, no number
+    ('n/a', ''),
+    ('', ''),
+    (None, ''),
+]
+
+
+def test_normalize_phones_on_export_formats():
+    written, expected = zip(*FORMATS)
+    numbers = pd.Series(written, index=range(10, 10 + len(written)), dtype=object)
+    normalized = normalize_phones(numbers)
+    assert normalized.index.equals(numbers.index)
+    assert normalized.tolist() == list(expected)
+
+
+def test_normalize_phones_is_idempotent():
+    normalized = normalize_phones(pd.Series([written for written, _ in FORMATS], dtype=object))
+    assert normalize_phones(normalized).tolist() == normalized.tolist()
+
+
+def test_shared_lines_compare_canonical_forms():
+    numbers = pd.Series(['020 7219 5353', '004420 7219 5353', '0161 624 4248', '', ''], dtype=object)
+    assert shared_line_mask(numbers).tolist() == [True, True, False, False, False]
+
+
+def test_phone_index():
+    index = PhoneIndex(['020 7219 5353', '2072195353', '0161 624 4248', '020 7219 5353', ''], [1, 2, 3, 4, 5])
+    assert index.members('0207 219 5353') == [1, 2, 4]
+    assert index.members('0161 624 4248') == [3]
+    assert index.shared() == {'020 7219 5353': [1, 2, 4]}
+    assert len(index) == 2
+
+
+def test_call_slots_batch_shared_numbers_within_a_tier():
+    df = pd.DataFrame({
+        'id_parliament': [1, 2, 3, 4, 5],
+        'Phone': ['020 7219 5353', '0161 624 4248', '0207 219 5353', '020 7219 5353', '0161 999 0000'],
+        'priority_rank': [1, 1, 1, 2, 2],
+    })
+    slots = call_slots(df)
+    assert slots['id_parliament'].tolist() == [1, 3, 2, 4, 5]
+    assert slots['Call slot'].tolist() == [1, 1, 2, 3, 4]
+    assert slots['Direct line'].tolist() == [False, False, True, False, True]
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from scoring import select_top, top_k
+
+
+def full_sort(scores, k):
+    """The first k positions of a stable sort, highest score first"""
+    return np.argsort(-np.asarray(scores, dtype=float), kind='stable')[:k]
+
+
+def test_matches_full_sort_with_many_ties():
+    rng = np.random.default_rng(0)
+    for size in (1, 2, 7, 50, 300):
+        scores = rng.integers(0, 5, size) * 0.5
+        for k in range(size + 2):
+            assert top_k(scores, k).tolist() == full_sort(scores, k).tolist(), (size, k)
+
+
+def test_ties_at_the_cut_go_to_the_earliest():
+    scores = [1, 3, 2, 2, 2, 3, 2]
+    assert top_k(scores, 4).tolist() == [1, 5, 2, 3]
+    assert top_k(scores, 2).tolist() == [1, 5]
+
+
+def test_k_out_of_range():
+    assert top_k([1, 2], 0).tolist() == []
+    assert top_k([1, 2], -1).tolist() == []
+    assert top_k([1, 2], None).tolist() == [1, 0]
+    assert top_k([], 3).tolist() == []
+
+
+def test_select_top():
+    df = pd.DataFrame({'Party': ['Labour', 'Green Party', 'Crossbench', 'Labour', 'Conservative']})
+    top = select_top(df, {'top_k': 3, 'weights': {'party': {'Green Party': 3, 'Labour': 2}}})
+    assert top.index.tolist() == [1, 0, 3]
+    assert top['Score'].tolist() == [3, 2, 2]
@@ -0,0 +1,71 @@
+import json
+import os
+import random
+from collections import Counter
+
+import pandas as pd
+
+from output_files import write_csv
+from shard_sheets import CALL_MINUTES, SHARED_LINE_MINUTES, assign_shards, call_minutes, shard_sheet
+
+
+def roster(size, seed=0):
+    rng = random.Random(seed)
+    keys = [str(1000 + i) for i in range(size)]
+    tiers = [str(i // 10) for i in range(size)]
+    minutes = [rng.choice([5, 5, 5, 8]) for _ in range(size)]
+    return keys, tiers, minutes
+
+
+def test_tiers_are_balanced():
+    keys, tiers, minutes = roster(100)
+    shards = assign_shards(keys, tiers, minutes, 4)
+    for tier in set(tiers):
+        counts = Counter(shard for shard, t in zip(shards, tiers) if t == tier)
+        assert max(counts.values()) - min(counts.get(s, 0) for s in range(4)) <= 1
+
+
+def test_shrinking_keeps_assignments_on_remaining_shards():
+    keys, tiers, minutes = roster(100)
+    before = assign_shards(keys, tiers, minutes, 4)
+    after = assign_shards(keys, tiers, minutes, 3, dict(zip(keys, before)))
+
+    for old, new in zip(before, after):
+        if old < 3:
+            assert new == old
+        else:
+            assert new < 3
+    # The fourth volunteer's contacts are spread over the other three
+    moved = Counter(new for old, new in zip(before, after) if old == 3)
+    assert len(moved) == 3
+
+
+def test_new_contacts_fill_in_without_moving_others():
+    keys, tiers, minutes = roster(100)
+    before = dict(zip(keys[:80], assign_shards(keys[:80], tiers[:80], minutes[:80], 4)))
+    after = assign_shards(keys, tiers, minutes, 4, before)
+    assert all(after[i] == before[key] for i, key in enumerate(keys[:80]))
+
+
+def test_shared_lines_take_longer():
+    header = ['id_parliament', 'Phone']
+    rows = [['1', '020 7219 3000'], ['2', '0207 219 3000'], ['3', '0161 624 4248']]
+    assert call_minutes(header, rows) == [CALL_MINUTES + SHARED_LINE_MINUTES] * 2 + [CALL_MINUTES]
+    assert call_minutes(['id_parliament'], [['1']]) == [CALL_MINUTES]
+
+
+def test_shard_sheet_going_from_four_to_three(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sheet = str(tmp_path / 'ranked.csv')
+    write_csv(pd.DataFrame({'id_parliament': range(40), 'Phone': [f'0161 624 {i:04d}' for i in range(40)]}), sheet)
+
+    shard_sheet(sheet, 4, output_dir=str(tmp_path))
+    with open(tmp_path / 'ranked' / 'assignments.json') as f:
+        before = json.load(f)['assignments']
+    paths = shard_sheet(sheet, 3, output_dir=str(tmp_path))
+    with open(tmp_path / 'ranked' / 'assignments.json') as f:
+        after = json.load(f)['assignments']
+
+    assert [os.path.basename(path) for path in paths] == ['ranked-01.csv', 'ranked-02.csv', 'ranked-03.csv']
+    assert not os.path.exists(tmp_path / 'ranked' / 'ranked-04.csv')
+    assert all(after[key] == shard for key, shard in before.items() if shard < 3)